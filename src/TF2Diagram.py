@@ -29,8 +29,12 @@ python tf2diagram.py /path/to/terraform/files -o my_diagram.png
 import os
 import re
 import json
+import hashlib
 import argparse
-from typing import Dict, List, Any, Set, Tuple
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Set, Tuple
 import hcl2
 import graphviz as gv
 
@@ -38,14 +42,14 @@ import graphviz as gv
 AWS_RESOURCE_TYPES = {
     # Network
     "aws_vpc": {"shape": "box", "label": "VPC", "color": "#F9DFCB", "group": "network", "container": True},
-    "aws_subnet": {"shape": "box", "label": "Subnet", "color": "#D8E4F1", "group": "network", "parent": "vpc"},
+    "aws_subnet": {"shape": "box", "label": "Subnet", "color": "#D8E4F1", "group": "network", "parent": "vpc", "container": True},
     "aws_security_group": {"shape": "box", "label": "Security Group", "color": "#FFEACC", "group": "network"},
     "aws_internet_gateway": {"shape": "diamond", "label": "IGW", "color": "#D8E4F1", "group": "network"},
     "aws_route_table": {"shape": "box", "label": "Route Table", "color": "#D8E4F1", "group": "network"},
-    "aws_nat_gateway": {"shape": "diamond", "label": "NAT Gateway", "color": "#D8E4F1", "group": "network"},
+    "aws_nat_gateway": {"shape": "diamond", "label": "NAT Gateway", "color": "#D8E4F1", "group": "network", "parent": "subnet"},
     
     # Compute
-    "aws_instance": {"shape": "box", "label": "EC2", "color": "#FCE2D7", "group": "compute"},
+    "aws_instance": {"shape": "box", "label": "EC2", "color": "#FCE2D7", "group": "compute", "parent": "subnet"},
     "aws_launch_template": {"shape": "box", "label": "Launch Template", "color": "#FCE2D7", "group": "compute"},
     "aws_autoscaling_group": {"shape": "box", "label": "Auto Scaling", "color": "#F8CECC", "group": "compute"},
     
@@ -85,178 +89,766 @@ AWS_RESOURCE_TYPES = {
     "aws_cloudwatch_alarm": {"shape": "box", "label": "CloudWatch Alarm", "color": "#E1D5E7", "group": "monitoring"},
 }
 
-def parse_terraform_files(directory: str) -> Dict[str, Any]:
+# Relationship types that place the target inside the source in the diagram
+CONTAINMENT_RELATIONSHIPS = ('contains', 'hosts', 'runs')
+
+# Module block arguments that are not input variables
+MODULE_META_ARGUMENTS = {'source', 'version', 'count', 'for_each', 'providers', 'depends_on'}
+
+# File name of the command line's parse cache, kept in the scanned directory
+DEFAULT_PARSE_CACHE = '.tf2diagram_cache.json'
+
+# Start of a ${...} interpolation or %{...} template directive; $${ is an escape
+TEMPLATE_START_PATTERN = re.compile(r'(?<!\$)[$%]\{')
+
+# A traversal such as aws_subnet.private[0].id or module.vpc.vpc_id; the
+# lookbehind keeps attribute chains from also matching from their middle
+TRAVERSAL_PATTERN = re.compile(r'(?<![\w.\]-])([A-Za-z_][\w-]*)((?:\.(?:[A-Za-z_][\w-]*|\*)|\[\d+\]|\[\*\])+)')
+
+# Traversal roots that never point at another block
+IGNORED_ROOTS = {'each', 'count', 'self', 'path', 'terraform'}
+
+def find_terraform_files(directory: str) -> List[str]:
+    """
+    List all Terraform (.tf) files below a directory.
+    
+    Args:
+        directory: Path to directory containing Terraform files
+        
+    Returns:
+        Sorted list of file paths
+    """
+    file_paths = []
+    for root, dirs, files in os.walk(directory):
+        # Modules downloaded by terraform init are loaded through their callers
+        dirs[:] = [d for d in dirs if d != '.terraform']
+        file_paths.extend(os.path.join(root, file) for file in files if file.endswith('.tf'))
+    return sorted(file_paths)
+
+def parse_terraform_source(file_path: str, text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse the HCL content of one file.
+    
+    Runs in worker processes, so it only takes and returns plain data.
+    
+    Args:
+        file_path: Path of the file, for error messages
+        text: File content
+        
+    Returns:
+        Parsed HCL as a dictionary, or None if it could not be parsed
+    """
+    try:
+        return hcl2.loads(text)
+    except Exception as e:
+        print(f"Error parsing {file_path}: {str(e)}")
+        return None
+
+def load_parse_cache(cache_file: Optional[str]) -> Dict[str, Any]:
+    """Load cached parse results, or an empty cache."""
+    if not cache_file or not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable parse cache {cache_file}: {e}")
+        return {}
+
+def save_parse_cache(cache_file: Optional[str], cache: Dict[str, Any]) -> None:
+    """Write cached parse results back to disk."""
+    if not cache_file:
+        return
+    try:
+        with open(cache_file, 'w') as f:
+            json.dump(cache, f)
+    except (OSError, TypeError) as e:
+        print(f"Could not write parse cache {cache_file}: {e}")
+
+def parse_files_cached(file_paths: List[str], cache_file: Optional[str] = None,
+                       max_workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse Terraform files, reusing cached results for unchanged files.
+    
+    A cache entry is reused when the file's mtime is unchanged, or when its
+    content hash still matches after the mtime moved (e.g. a checkout). The
+    remaining files are parsed in a process pool, since hcl2 parsing is
+    CPU-bound pure Python.
+    
+    Args:
+        file_paths: Files to parse
+        cache_file: JSON file holding parse results between runs; None (the default) disables caching
+        max_workers: Worker processes for parsing; defaults to the CPU count
+        
+    Returns:
+        Dictionary mapping file path to parsed HCL, without files that failed to parse
+    """
+    cache = load_parse_cache(cache_file)
+    parsed = {}
+    pending = []
+    
+    for file_path in file_paths:
+        key = os.path.abspath(file_path)
+        entry = cache.get(key)
+        try:
+            mtime = os.path.getmtime(file_path)
+            if entry and entry['mtime'] == mtime:
+                parsed[file_path] = entry['content']
+                continue
+            
+            with open(file_path, 'r') as f:
+                text = f.read()
+        except Exception as e:
+            print(f"Error opening {file_path}: {e}")
+            continue
+        
+        content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        if entry and entry['hash'] == content_hash:
+            entry['mtime'] = mtime
+            parsed[file_path] = entry['content']
+        else:
+            pending.append((file_path, key, mtime, content_hash, text))
+    
+    if pending:
+        print(f"Parsing {len(pending)} of {len(file_paths)} Terraform files")
+        paths = [item[0] for item in pending]
+        texts = [item[4] for item in pending]
+        if len(pending) > 1 and max_workers != 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                chunksize = max(1, len(pending) // (4 * (max_workers or os.cpu_count() or 1)))
+                results = list(executor.map(parse_terraform_source, paths, texts, chunksize=chunksize))
+        else:
+            results = list(map(parse_terraform_source, paths, texts))
+        
+        for (file_path, key, mtime, content_hash, _), content in zip(pending, results):
+            if content is not None:
+                parsed[file_path] = content
+                cache[key] = {'mtime': mtime, 'hash': content_hash, 'content': content}
+    
+    # Forget files that no longer exist so the cache does not grow forever
+    for key in [key for key in cache if not os.path.exists(key)]:
+        del cache[key]
+    save_parse_cache(cache_file, cache)
+    
+    return {file_path: parsed[file_path] for file_path in file_paths if file_path in parsed}
+
+def unquote(text: str) -> str:
+    """Strip the double quotes newer hcl2 versions keep around labels and literals."""
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+        return text[1:-1]
+    return text
+
+def labelled_blocks(blocks: Any, labels: int):
+    """
+    Iterate over hcl2 blocks such as resource "type" "name" { ... }.
+    
+    hcl2 nests block labels as dictionaries, wrapped in lists by some parser
+    versions and not by others, and quoted by newer versions.
+    
+    Args:
+        blocks: Value of a block type in the parsed content, e.g. content['resource']
+        labels: Number of labels the block type takes
+        
+    Yields:
+        Tuples (labels, body)
+    """
+    for block in blocks if isinstance(blocks, list) else [blocks]:
+        if not isinstance(block, dict):
+            continue
+        for label, body in block.items():
+            if label.startswith('__'):
+                # Metadata such as __start_line__ in newer hcl2 versions
+                continue
+            if labels == 1:
+                yield (unquote(label),), body
+            else:
+                for inner_labels, inner_body in labelled_blocks(body, labels - 1):
+                    yield (unquote(label),) + inner_labels, inner_body
+
+def module_definition(module_dir: str, contents: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Collect the blocks of one Terraform module from its parsed files.
+    
+    Args:
+        module_dir: Directory of the module
+        contents: (file path, parsed HCL) for each .tf file directly in it
+        
+    Returns:
+        Dictionary with the module's resources (data sources included, as
+        "data.type.name"), module calls, variable defaults, locals and outputs
+    """
+    definition = {'dir': module_dir, 'resources': {}, 'modules': {}, 'variables': {}, 'locals': {}, 'outputs': {}}
+    
+    for file_path, content in contents:
+        for mode, prefix in (('resource', ''), ('data', 'data.')):
+            for (resource_type, resource_name), resource_config in labelled_blocks(content.get(mode, []), 2):
+                # Create a unique identifier for the resource
+                definition['resources'][f"{prefix}{resource_type}.{resource_name}"] = {
+                    'type': resource_type,
+                    'name': resource_name,
+                    'mode': 'data' if prefix else 'managed',
+                    'config': resource_config,
+                    'file': file_path
+                }
+        for (module_name,), call in labelled_blocks(content.get('module', []), 1):
+            definition['modules'][module_name] = {name: value for name, value in call.items()
+                                                  if not name.startswith('__')}
+        for (variable_name,), body in labelled_blocks(content.get('variable', []), 1):
+            definition['variables'][variable_name] = body.get('default') if isinstance(body, dict) else None
+        for (output_name,), body in labelled_blocks(content.get('output', []), 1):
+            definition['outputs'][output_name] = body.get('value') if isinstance(body, dict) else None
+        for block in content.get('locals', []):
+            definition['locals'].update((name, value) for name, value in block.items() if not name.startswith('__'))
+    
+    return definition
+
+def load_module_manifest(root_dir: str) -> Dict[str, str]:
+    """
+    Read where `terraform init` installed a root module's non-local modules.
+    
+    Args:
+        root_dir: Root module directory
+        
+    Returns:
+        Dictionary mapping module keys ("vpc", "vpc.subnets") to directories
+    """
+    manifest_file = os.path.join(root_dir, '.terraform', 'modules', 'modules.json')
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, 'r') as f:
+            modules = json.load(f).get('Modules', [])
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable module manifest {manifest_file}: {e}")
+        return {}
+    return {module['Key']: os.path.normpath(os.path.join(root_dir, module['Dir']))
+            for module in modules if module.get('Key')}
+
+def module_source_dir(module_dir: str, call: Dict[str, Any], manifest: Dict[str, str], key: str) -> Optional[str]:
+    """
+    Directory holding the source of a module call, or None if it is not available locally.
+    
+    Args:
+        module_dir: Directory of the calling module
+        call: Body of the module block
+        manifest: Result of load_module_manifest for the root module
+        key: Module key of the call, e.g. "vpc.subnets"
+    """
+    source = unquote(str(call.get('source', '')))
+    if source.startswith('./') or source.startswith('../'):
+        return os.path.normpath(os.path.join(module_dir, source))
+    return manifest.get(key)
+
+def module_file_paths(module_dir: str) -> List[str]:
+    """Sorted .tf files directly in a module directory, or none if it does not exist."""
+    if not os.path.isdir(module_dir):
+        return []
+    return sorted(os.path.join(module_dir, file) for file in os.listdir(module_dir) if file.endswith('.tf'))
+
+def build_terraform_graph(directory: str, cache_file: Optional[str] = None,
+                          max_workers: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Parse a Terraform tree into resources and the module scopes needed to
+    resolve references between them.
+    
+    Every directory with .tf files is a module. Directories that no other
+    module uses as a local source are root modules, and their module calls
+    are instantiated recursively. Resources inside module instances get
+    Terraform addresses such as "module.vpc.aws_subnet.private". When the
+    tree holds several root modules (e.g. envs/dev and envs/prod), ids are
+    qualified with the root's path relative to ``directory``, as in
+    "envs/dev/module.vpc.aws_subnet.private", so equal addresses in
+    different roots stay apart; a root at ``directory`` itself keeps plain
+    addresses.
+    
+    Each module source is parsed and collected once, however many times it
+    is instantiated. Sources outside the tree are found through relative
+    paths or the .terraform/modules manifest written by `terraform init`,
+    and are parsed together in one batch (one more per level of local
+    sources that themselves lie outside the tree).
+    
+    Args:
+        directory: Path to directory containing Terraform files
+        cache_file: JSON file caching parse results between runs; None (the default) disables caching
+        max_workers: Worker processes for parsing; defaults to the CPU count
+        
+    Returns:
+        Tuple (resources, scopes). Each resource records its root module
+        directory ('root'), module address prefix ('module') and scope key
+        ('scope'). scopes maps scope keys to the resource id prefix and the
+        module's variables (as (value, scope key) pairs), locals and outputs.
+    """
+    contents_by_dir = defaultdict(list)
+    
+    def add_contents(file_paths: List[str]) -> None:
+        for file_path, content in parse_files_cached(file_paths, cache_file, max_workers).items():
+            contents_by_dir[os.path.normpath(os.path.dirname(file_path))].append((file_path, content))
+    
+    add_contents(find_terraform_files(directory))
+    definitions = {module_dir: module_definition(module_dir, contents)
+                   for module_dir, contents in contents_by_dir.items()}
+    
+    # Directories used as a local module source are not roots
+    used_as_module = set()
+    for module_dir, definition in definitions.items():
+        for call in definition['modules'].values():
+            source_dir = module_source_dir(module_dir, call, {}, '')
+            if source_dir:
+                used_as_module.add(source_dir)
+    root_dirs = [module_dir for module_dir in sorted(definitions) if module_dir not in used_as_module]
+    manifests = {root_dir: load_module_manifest(root_dir) for root_dir in root_dirs}
+    
+    # Load sources outside the tree in batches: everything terraform init
+    # installed, then local sources those modules call in turn
+    pending = {source_dir for manifest in manifests.values() for source_dir in manifest.values()}
+    pending |= used_as_module
+    while True:
+        pending -= definitions.keys()
+        if not pending:
+            break
+        add_contents([file_path for module_dir in sorted(pending) for file_path in module_file_paths(module_dir)])
+        loaded = {module_dir: module_definition(module_dir, contents_by_dir[module_dir])
+                  if contents_by_dir.get(module_dir) else None
+                  for module_dir in pending}
+        definitions.update(loaded)
+        pending = {module_source_dir(module_dir, call, {}, '')
+                   for module_dir, definition in loaded.items() if definition
+                   for call in definition['modules'].values()} - {None}
+    
+    resources: Dict[str, Any] = {}
+    scopes: Dict[str, Any] = {}
+    
+    def instantiate(definition, scope, root_dir, id_prefix, prefix, variables, manifest, ancestors):
+        scopes[scope] = {
+            'prefix': id_prefix + prefix,
+            'variables': variables,
+            'locals': definition['locals'],
+            'outputs': definition['outputs']
+        }
+        for resource_id, resource in definition['resources'].items():
+            resources[id_prefix + prefix + resource_id] = {**resource, 'root': root_dir, 'module': prefix,
+                                                           'scope': scope}
+        
+        for module_name, call in definition['modules'].items():
+            child_prefix = f"{prefix}module.{module_name}."
+            key = child_prefix.replace('module.', '').rstrip('.')
+            source_dir = module_source_dir(definition['dir'], call, manifest, key)
+            child = definitions.get(source_dir) if source_dir else None
+            if child is None or source_dir in ancestors:
+                print(f"Could not load source of {child_prefix.rstrip('.')} ({call.get('source')})")
+                continue
+            
+            # Inputs are evaluated in the calling module, defaults in the module itself
+            child_scope = f"{scope}module.{module_name}."
+            child_variables = {name: (default, child_scope) for name, default in child['variables'].items()}
+            child_variables.update((name, (value, scope)) for name, value in call.items()
+                                   if name not in MODULE_META_ARGUMENTS)
+            instantiate(child, child_scope, root_dir, id_prefix, child_prefix, child_variables, manifest,
+                        ancestors | {source_dir})
+    
+    for root_dir in root_dirs:
+        definition = definitions[root_dir]
+        # Graphviz reads ':' in node ids as a port, so roots are separated by '/'
+        relative_dir = os.path.relpath(root_dir, directory).replace(os.sep, '/')
+        id_prefix = f"{relative_dir}/" if len(root_dirs) > 1 and relative_dir != '.' else ''
+        scope = f"{root_dir}:"
+        variables = {name: (default, scope) for name, default in definition['variables'].items()}
+        instantiate(definition, scope, root_dir, id_prefix, '', variables, manifests[root_dir], {root_dir})
+    
+    return resources, scopes
+
+def parse_terraform_files(directory: str, cache_file: Optional[str] = None,
+                          max_workers: Optional[int] = None) -> Dict[str, Any]:
     """
     Parse all Terraform (.tf) files in the specified directory and return a dictionary
     of the resources defined.
     
     Args:
         directory: Path to directory containing Terraform files
+        cache_file: JSON file caching parse results between runs; None (the default) disables caching
+        max_workers: Worker processes for parsing; defaults to the CPU count
         
     Returns:
-        Dictionary of parsed Terraform resources
-    """
-    all_resources = {}
-    
-    # Walk through all files in directory
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.tf'):
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r') as f:
-                        try:
-                            # Parse HCL content
-                            content = hcl2.load(f)
-                            
-                            # Extract resources
-                            if 'resource' in content:
-                                resources = content['resource']
-                                # Handle resource structure which can be a list of dictionaries
-                                for resource_block in resources:
-                                    for resource_type, instances in resource_block.items():
-                                        # Instances can be a list in some HCL parsers
-                                        if isinstance(instances, list):
-                                            for instance in instances:
-                                                for resource_name, resource_config in instance.items():
-                                                    # Create a unique identifier for the resource
-                                                    resource_id = f"{resource_type}.{resource_name}"
-                                                    all_resources[resource_id] = {
-                                                        'type': resource_type,
-                                                        'name': resource_name,
-                                                        'config': resource_config,
-                                                        'file': file_path
-                                                    }
-                                        # Or a dictionary in others
-                                        elif isinstance(instances, dict):
-                                            for resource_name, resource_config in instances.items():
-                                                resource_id = f"{resource_type}.{resource_name}"
-                                                all_resources[resource_id] = {
-                                                    'type': resource_type,
-                                                    'name': resource_name,
-                                                    'config': resource_config,
-                                                    'file': file_path
-                                                }
-                        except Exception as e:
-                            print(f"Error parsing {file_path}: {str(e)}")
-                except Exception as e:
-                    print(f"Error opening {file_path}: {e}")
-    
-    return all_resources
+        Dictionary of parsed Terraform resources, see build_terraform_graph
+    """
+    return build_terraform_graph(directory, cache_file, max_workers)[0]
+
+def expression_segments(text: str) -> List[str]:
+    """
+    Split the HCL expressions out of a string leaf of the parsed config.
+    
+    Only the bodies of ${...} interpolations and %{...} directives are
+    expressions; python-hcl2 wraps every unquoted expression in ${...}, so
+    everything else is literal text, such as domain names.
+    
+    Args:
+        text: String value from the parsed config
+        
+    Returns:
+        List of expression strings
+    """
+    if '{' not in text:
+        return []
+    
+    segments = []
+    position = 0
+    while True:
+        match = TEMPLATE_START_PATTERN.search(text, position)
+        if not match:
+            return segments
+        
+        end = template_end(text, match.end())
+        segments.append(text[match.end():end - 1 if text[end - 1:end] == '}' else end])
+        position = end
+
+def template_end(text: str, position: int) -> int:
+    """
+    Index just past the brace closing a template opened before ``position``.
+    
+    Objects and nested templates nest; braces inside quoted strings are skipped.
+    """
+    depth = 1
+    while position < len(text) and depth:
+        char = text[position]
+        if char == '"':
+            position = string_literal_end(text, position)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        position += 1
+    return position
+
+def string_literal_end(text: str, start: int) -> int:
+    """
+    Index just past the quoted string opening at ``text[start]``.
+    
+    Escapes are skipped and ${...}/%{...} templates inside the string may
+    hold quoted strings of their own.
+    """
+    position = start + 1
+    while position < len(text):
+        if text[position] == '\\':
+            position += 2
+        elif text[position] == '"':
+            return position + 1
+        elif text.startswith('$${', position):
+            position += 3
+        elif text[position] in '$%' and text.startswith('{', position + 1):
+            position = template_end(text, position + 2)
+        else:
+            position += 1
+    return position
+
+def traversal_reference(root: str, attributes: List[str]) -> Optional[str]:
+    """
+    Reference id named by a traversal, or None if it names nothing addressable.
+    
+    Resources are "type.name", data sources "data.type.name", module outputs
+    "module.name.output" (or "module.name" for the whole module), and
+    variables and locals "var.name" and "local.name".
+    
+    Args:
+        root: First identifier of the traversal
+        attributes: Following attribute names, with indexes and splats removed
+        
+    Returns:
+        Reference id or None
+    """
+    if root in IGNORED_ROOTS or not attributes:
+        return None
+    if root == 'data':
+        return f"data.{attributes[0]}.{attributes[1]}" if len(attributes) > 1 else None
+    if root == 'module':
+        return '.'.join(['module'] + attributes[:2])
+    return f"{root}.{attributes[0]}"
 
 def extract_references_from_string(text: str) -> List[str]:
     """
-    Extract resource references from a string using regex patterns.
+    Extract references from one string value of a parsed config.
     
     Args:
         text: String to search for references
         
     Returns:
-        List of resource references found
+        List of references found, see traversal_reference for their format
     """
     references = []
     
-    # Regular expressions to find resource references in HCL
-    ref_patterns = [
-        r'(\${)?\s*([a-zA-Z0-9_-]+)\.([a-zA-Z0-9_-]+)(?:\.([a-zA-Z0-9_-]+))?\s*}?',  # ${aws_vpc.main.id}
-        r'([a-zA-Z0-9_-]+)\.([a-zA-Z0-9_-]+)(?:\.([a-zA-Z0-9_-]+))?'                 # aws_vpc.main.id
-    ]
-    
-    for pattern in ref_patterns:
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            # Extract referenced resource type and name
-            if match.group(1) == '${' or match.group(1) is None:
-                # Group arrangement depends on which pattern matched
-                if len(match.groups()) == 3:
-                    ref_type, ref_name = match.group(2), match.group(3)
-                elif len(match.groups()) == 4:
-                    ref_type, ref_name = match.group(2), match.group(3)
-                else:
-                    continue
-                
-                # Create reference ID
-                ref_id = f"{ref_type}.{ref_name}"
-                references.append(ref_id)
+    for expression in expression_segments(text):
+        position = 0
+        while position < len(expression):
+            # Quoted strings are templates: only their own ${...} hold references
+            start = expression.find('"', position)
+            if start < 0:
+                start = end = len(expression)
+            else:
+                end = string_literal_end(expression, start)
+            
+            for match in TRAVERSAL_PATTERN.finditer(expression[position:start]):
+                attributes = [part for part in re.split(r'\.|\[[^\]]*\]', match.group(2)) if part and part != '*']
+                ref_id = traversal_reference(match.group(1), attributes)
+                if ref_id:
+                    references.append(ref_id)
+            references.extend(extract_references_from_string(expression[start + 1:end - 1]))
+            position = end
     
     return references
 
-def extract_relationships(resources: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+def extract_references(value: Any) -> List[str]:
+    """
+    Collect the references in a parsed config value by walking its structure.
+    
+    Only string leaves can hold expressions, so dicts and lists are walked
+    recursively and each string is scanned once; keys are block and
+    attribute names and are skipped.
+    
+    Args:
+        value: Parsed config value (dict, list, string or scalar)
+        
+    Returns:
+        List of distinct references, in order of first appearance
+    """
+    references = {}
+    
+    def walk(item: Any) -> None:
+        if isinstance(item, str):
+            references.update(dict.fromkeys(cached_references(item)))
+        elif isinstance(item, dict):
+            for child in item.values():
+                walk(child)
+        elif isinstance(item, (list, tuple)):
+            for child in item:
+                walk(child)
+    
+    walk(value)
+    return list(references)
+
+@lru_cache(maxsize=None)
+def cached_references(text: str) -> Tuple[str, ...]:
+    """
+    Memoized extract_references_from_string, deduplicated in order of appearance.
+    
+    Modules repeat the same expressions (e.g. "${aws_vpc.main.id}") across
+    many resources, so each distinct string is only scanned once.
+    
+    Args:
+        text: String to search for references
+        
+    Returns:
+        Tuple of distinct resource references found
+    """
+    return tuple(dict.fromkeys(extract_references_from_string(text)))
+
+def index_resources(resources: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Index resources by type.
+    
+    Args:
+        resources: Dictionary of parsed Terraform resources
+        
+    Returns:
+        Dictionary mapping resource type to resource ids
+    """
+    by_type: Dict[str, List[str]] = defaultdict(list)
+    for resource_id, resource in resources.items():
+        by_type[resource['type']].append(resource_id)
+    return by_type
+
+def reference_resolver(resources: Dict[str, Any], scopes: Optional[Dict[str, Any]] = None):
+    """
+    Build functions resolving the references in a config value to resource ids.
+    
+    References are resolved in the scope of the module instance holding the
+    value: var.x follows the module call's input into the calling module,
+    local.x the module's locals, and module.x.output the child module's
+    output value, down to the resources they finally point at. Results are
+    memoized per reference and scope, since a variable or output is usually
+    referenced by many resources.
+    
+    The second function tells whether a value depends on a variable or
+    local whose value is not known here, such as a root variable without a
+    default. A literal value is always known.
+    
+    Args:
+        resources: Dictionary of parsed Terraform resources
+        scopes: Module scopes from build_terraform_graph; without them only
+            direct resource references resolve
+        
+    Returns:
+        Tuple of functions (value, scope key) -> list of resource ids and
+        (value, scope key) -> whether the value is unset
+    """
+    scopes = scopes or {}
+    memo: Dict[Tuple[str, Optional[str]], List[str]] = {}
+    unset_memo: Dict[Tuple[str, Optional[str]], bool] = {}
+    
+    def resolve_reference(ref_id: str, scope: Optional[str]) -> List[str]:
+        key = (ref_id, scope)
+        if key in memo:
+            return memo[key]
+        # Placeholder so locals or variables referring to each other terminate
+        memo[key] = []
+        
+        module_scope = scopes.get(scope)
+        kind, _, rest = ref_id.partition('.')
+        if module_scope is None:
+            resolved = [ref_id] if ref_id in resources else []
+        elif kind == 'var':
+            value, value_scope = module_scope['variables'].get(rest, (None, scope))
+            resolved = resolve(value, value_scope)
+        elif kind == 'local':
+            resolved = resolve(module_scope['locals'].get(rest), scope)
+        elif kind == 'module':
+            module_name, _, output = rest.partition('.')
+            child_scope = f"{scope}module.{module_name}."
+            outputs = scopes[child_scope]['outputs'] if child_scope in scopes else {}
+            resolved = resolve(outputs.get(output) if output else list(outputs.values()), child_scope)
+        else:
+            candidate = module_scope['prefix'] + ref_id
+            resolved = [candidate] if candidate in resources else []
+        
+        memo[key] = resolved
+        return resolved
+    
+    def resolve(value: Any, scope: Optional[str]) -> List[str]:
+        resolved = {}
+        for ref_id in extract_references(value):
+            resolved.update(dict.fromkeys(resolve_reference(ref_id, scope)))
+        return list(resolved)
+    
+    def unset_reference(ref_id: str, scope: Optional[str]) -> bool:
+        key = (ref_id, scope)
+        if key in unset_memo:
+            return unset_memo[key]
+        # Placeholder so locals or variables referring to each other terminate
+        unset_memo[key] = False
+        
+        module_scope = scopes.get(scope)
+        kind, _, rest = ref_id.partition('.')
+        if kind not in ('var', 'local'):
+            unset = False
+        elif module_scope is None:
+            unset = True
+        elif kind == 'var':
+            value, value_scope = module_scope['variables'].get(rest, (None, scope))
+            unset = value is None or is_unset(value, value_scope)
+        else:
+            value = module_scope['locals'].get(rest)
+            unset = value is None or is_unset(value, scope)
+        
+        unset_memo[key] = unset
+        return unset
+    
+    def is_unset(value: Any, scope: Optional[str]) -> bool:
+        return any(unset_reference(ref_id, scope) for ref_id in extract_references(value))
+    
+    return resolve, is_unset
+
+def references_of_type(ref_ids: List[str], resource_type: str, resources: Dict[str, Any],
+                       by_type: Dict[str, List[str]], unset: bool = False) -> List[str]:
+    """
+    Keep the resolved references to resources of one type.
+    
+    When none remain because the value comes from an unset variable or
+    local (``unset``) and exactly one resource of that type exists, that
+    resource is assumed. Literal values, such as a hard-coded VPC id, never
+    fall back.
+    
+    Args:
+        ref_ids: Resource ids resolved from a config value
+        resource_type: Type the referenced resources must have
+        resources: Dictionary of parsed Terraform resources
+        by_type: Index built by index_resources
+        unset: Whether the value depends on an unset variable or local
+        
+    Returns:
+        List of referenced resource ids
+    """
+    resolved = [ref_id for ref_id in ref_ids if resources[ref_id]['type'] == resource_type]
+    if not resolved and unset and len(by_type.get(resource_type, [])) == 1:
+        resolved = list(by_type[resource_type])
+    return resolved
+
+def extract_relationships(resources: Dict[str, Any], scopes: Optional[Dict[str, Any]] = None) -> List[Tuple[str, str, str]]:
     """
     Extract relationships between resources based on references in their configuration.
     
+    Resources are indexed by type up front, so every reference resolves
+    with a dictionary lookup instead of a scan over all resources.
+    
     Args:
         resources: Dictionary of parsed Terraform resources
+        scopes: Module scopes from build_terraform_graph, to follow variables,
+            locals and module outputs across modules
         
     Returns:
         List of tuples (source_id, target_id, relationship_type)
     """
     relationships = []
     containment_relationships = []
+    by_type = index_resources(resources)
+    resolve, is_unset = reference_resolver(resources, scopes)
+    
+    def referenced(value: Any, scope: Optional[str], resource_type: str) -> List[str]:
+        return references_of_type(resolve(value, scope), resource_type, resources, by_type,
+                                  unset=is_unset(value, scope))
     
     # First pass: extract direct references from config
     for resource_id, resource in resources.items():
-        # Convert config to a string for regex search
-        try:
-            config_str = json.dumps(resource['config'])
-        except TypeError:
-            # Handle case where config might not be JSON serializable
-            config_str = str(resource['config'])
-        
         # Find all references to other resources
-        references = extract_references_from_string(config_str)
+        references = resolve(resource['config'], resource.get('scope'))
         
         for ref_id in references:
-            # Skip self-references and check if referenced resource exists
-            if ref_id != resource_id and ref_id in resources:
+            # Skip self-references
+            if ref_id != resource_id:
                 relationships.append((resource_id, ref_id, "references"))
     
+    # Target groups route to the ECS services whose load_balancer blocks name them
+    routes_by_target_group = defaultdict(list)
+    for ecs_id in by_type.get('aws_ecs_service', []):
+        ecs_config = resources[ecs_id]['config']
+        if by_type.get('aws_lb_target_group') and 'load_balancer' in ecs_config:
+            target_groups = referenced(ecs_config['load_balancer'], resources[ecs_id].get('scope'),
+                                       'aws_lb_target_group')
+            for target_group_id in target_groups:
+                routes_by_target_group[target_group_id].append(ecs_id)
+    
     # Second pass: infer logical containment relationships based on AWS architecture
     for resource_id, resource in resources.items():
         resource_type = resource['type']
+        config = resource['config']
+        scope = resource.get('scope')
         
         # Handle special containment cases
         if resource_type == 'aws_subnet':
             # Find the VPC this subnet belongs to from its config
-            if 'vpc_id' in resource['config']:
-                vpc_ref = resource['config']['vpc_id']
-                for vpc_id, vpc in resources.items():
-                    if vpc['type'] == 'aws_vpc' and extract_references_from_string(str(vpc_ref)):
-                        containment_relationships.append((vpc_id, resource_id, "contains"))
-                        break
+            if 'vpc_id' in config:
+                for vpc_id in referenced(config['vpc_id'], scope, 'aws_vpc')[:1]:
+                    containment_relationships.append((vpc_id, resource_id, "contains"))
         
         elif resource_type == 'aws_lb':
             # Load balancers are logically in subnets/VPC
-            if 'subnets' in resource['config']:
-                subnet_refs = resource['config']['subnets']
-                subnet_refs_str = str(subnet_refs)
-                for subnet_id, subnet in resources.items():
-                    if subnet['type'] == 'aws_subnet' and subnet['name'] in subnet_refs_str:
-                        containment_relationships.append((subnet_id, resource_id, "hosts"))
+            if 'subnets' in config:
+                for subnet_id in referenced(config['subnets'], scope, 'aws_subnet'):
+                    containment_relationships.append((subnet_id, resource_id, "hosts"))
         
         elif resource_type == 'aws_ecs_service':
             # ECS services are in ECS clusters
-            if 'cluster' in resource['config']:
-                cluster_ref = resource['config']['cluster']
-                for cluster_id, cluster in resources.items():
-                    if cluster['type'] == 'aws_ecs_cluster' and extract_references_from_string(str(cluster_ref)):
-                        containment_relationships.append((cluster_id, resource_id, "runs"))
+            if 'cluster' in config:
+                for cluster_id in referenced(config['cluster'], scope, 'aws_ecs_cluster'):
+                    containment_relationships.append((cluster_id, resource_id, "runs"))
             
             # ECS services use task definitions
-            if 'task_definition' in resource['config']:
-                task_ref = resource['config']['task_definition']
-                for task_id, task in resources.items():
-                    if task['type'] == 'aws_ecs_task_definition' and extract_references_from_string(str(task_ref)):
-                        relationships.append((resource_id, task_id, "uses"))
+            if 'task_definition' in config:
+                for task_id in referenced(config['task_definition'], scope, 'aws_ecs_task_definition'):
+                    relationships.append((resource_id, task_id, "uses"))
         
         elif resource_type == 'aws_lb_target_group':
             # Connect target groups to their targets (usually ECS services)
-            for ecs_id, ecs in resources.items():
-                if ecs['type'] == 'aws_ecs_service':
-                    if 'load_balancer' in ecs['config']:
-                        lb_config = str(ecs['config']['load_balancer'])
-                        if resource['name'] in lb_config:
-                            relationships.append((resource_id, ecs_id, "routes to"))
+            for ecs_id in routes_by_target_group.get(resource_id, []):
+                relationships.append((resource_id, ecs_id, "routes to"))
     
     # Combine both types of relationships
     all_relationships = relationships + containment_relationships
@@ -266,54 +858,96 @@ def identify_nested_resources(resources: Dict[str, Any], relationships: List[Tup
     """
     Identify which resources should be nested inside others in the diagram.
     
+    Relationships are indexed into an adjacency map once, so each resource
+    with a parent type only looks at its own neighbours. Containers can
+    themselves be members of other containers (VPC -> subnet -> instance).
+    
     Args:
         resources: Dictionary of parsed Terraform resources
         relationships: List of resource relationships
         
     Returns:
-        Dictionary mapping container resources to lists of contained resources
+        Dictionary mapping container resources to lists of contained resources,
+        without duplicates
     """
-    containers = {}
+    # Dicts keep members ordered and unique
+    containers: Dict[str, Dict[str, None]] = {}
     
     # Identify resources that can act as containers
     for resource_id, resource in resources.items():
         resource_type = resource['type']
         if resource_type in AWS_RESOURCE_TYPES and AWS_RESOURCE_TYPES[resource_type].get('container', False):
-            containers[resource_id] = []
+            containers[resource_id] = {}
     
-    # Find containment relationships
+    # Find containment relationships and index neighbours in both directions
+    neighbours = defaultdict(set)
     for source_id, target_id, rel_type in relationships:
-        if source_id in containers and rel_type in ['contains', 'hosts', 'runs']:
-            containers[source_id].append(target_id)
+        neighbours[source_id].add(target_id)
+        neighbours[target_id].add(source_id)
+        if source_id in containers and rel_type in CONTAINMENT_RELATIONSHIPS:
+            containers[source_id][target_id] = None
     
-    # Find implied containment based on AWS architecture
+    # Find implied containment based on AWS architecture: a resource sits in
+    # every related container of its parent type
     for resource_id, resource in resources.items():
         resource_type = resource['type']
         # Check if this resource has a defined parent type
         if resource_type in AWS_RESOURCE_TYPES and 'parent' in AWS_RESOURCE_TYPES[resource_type]:
-            parent_type = AWS_RESOURCE_TYPES[resource_type]['parent']
-            
-            # Special case for subnets in VPCs
-            if parent_type == 'vpc':
-                for vpc_id, vpc in resources.items():
-                    if vpc['type'] == 'aws_vpc':
-                        # Check if there's a relationship between this subnet and the VPC
-                        for source, target, _ in relationships:
-                            if (source == resource_id and target == vpc_id) or (source == vpc_id and target == resource_id):
-                                if vpc_id in containers:
-                                    containers[vpc_id].append(resource_id)
-            
-            # Special case for ECS services in clusters
-            elif parent_type == 'ecs_cluster':
-                for cluster_id, cluster in resources.items():
-                    if cluster['type'] == 'aws_ecs_cluster':
-                        # Check if there's a relationship between this service and the cluster
-                        for source, target, _ in relationships:
-                            if (source == resource_id and target == cluster_id) or (source == cluster_id and target == resource_id):
-                                if cluster_id in containers:
-                                    containers[cluster_id].append(resource_id)
-    
-    return containers
+            parent_type = f"aws_{AWS_RESOURCE_TYPES[resource_type]['parent']}"
+            for neighbour_id in neighbours.get(resource_id, ()):
+                if neighbour_id in containers and resources[neighbour_id]['type'] == parent_type:
+                    containers[neighbour_id][resource_id] = None
+    
+    return {container_id: list(members) for container_id, members in containers.items()}
+
+def build_containment_tree(containers: Dict[str, List[str]]) -> Dict[str, str]:
+    """
+    Choose a single parent for every contained resource, as the diagram can
+    only draw each node inside one cluster.
+    
+    Nested containers take the first container claiming them that does not
+    create a cycle. Other resources claimed by several containers (e.g. a
+    load balancer in several subnets) go to the deepest container enclosing
+    all of them, or stay at the top level if there is none.
+    
+    Args:
+        containers: Result of identify_nested_resources
+        
+    Returns:
+        Dictionary mapping resource id to its parent container id
+    """
+    claimed_by = defaultdict(list)
+    for container_id, members in containers.items():
+        for member_id in members:
+            if member_id != container_id:
+                claimed_by[member_id].append(container_id)
+    
+    parents: Dict[str, str] = {}
+    
+    def ancestry(container_id: str) -> List[str]:
+        chain = [container_id]
+        while chain[-1] in parents:
+            chain.append(parents[chain[-1]])
+        return chain
+    
+    # Place containers inside each other first
+    for member_id, claimers in claimed_by.items():
+        if member_id in containers:
+            for container_id in claimers:
+                if member_id not in ancestry(container_id):
+                    parents[member_id] = container_id
+                    break
+    
+    # Then place every other resource in the deepest common container
+    for member_id, claimers in claimed_by.items():
+        if member_id not in containers:
+            chains = [ancestry(container_id) for container_id in claimers]
+            common = [container_id for container_id in chains[0]
+                      if all(container_id in chain for chain in chains[1:])]
+            if common:
+                parents[member_id] = common[0]
+    
+    return parents
 
 def generate_enhanced_diagram(resources: Dict[str, Any], relationships: List[Tuple[str, str, str]], output_file: str):
     """
@@ -348,60 +982,42 @@ def generate_enhanced_diagram(resources: Dict[str, Any], relationships: List[Tup
     # Define rank groupings to maintain reasonable layout structure
     rank_same_groups = []
     
-    # Process VPC containers first (highest level)
-    for vpc_id, members in containers.items():
-        if resources[vpc_id]['type'] == 'aws_vpc':
-            with dot.subgraph(name=f"cluster_{vpc_id}") as c:
-                vpc_name = resources[vpc_id]['name']
-                c.attr(label=f"VPC: {vpc_name}", style='filled', color='#333333', fillcolor='#F9DFCB20', 
-                       fontsize='14', fontcolor='#333333', penwidth='2')
-                
-                # Add all resources that belong to this VPC
-                for member_id in members:
-                    if member_id in resources:
-                        resource_type = resources[member_id]['type']
-                        if resource_type in AWS_RESOURCE_TYPES:
-                            attrs = AWS_RESOURCE_TYPES[resource_type]
-                            label = f"{attrs['label']}\n{resources[member_id]['name']}"
-                            c.node(member_id, label=label, shape=attrs['shape'], 
-                                  style='filled', fillcolor=attrs['color'])
-    
-    # Process ECS clusters
-    for cluster_id, members in containers.items():
-        if resources[cluster_id]['type'] == 'aws_ecs_cluster':
-            with dot.subgraph(name=f"cluster_{cluster_id}") as c:
-                cluster_name = resources[cluster_id]['name']
-                c.attr(label=f"ECS Cluster: {cluster_name}", style='filled', color='#333333', 
-                       fillcolor='#FFE6CC20', fontsize='14', fontcolor='#333333', penwidth='2')
-                
-                # Add all resources that belong to this cluster
-                for member_id in members:
-                    if member_id in resources:
-                        resource_type = resources[member_id]['type']
-                        if resource_type in AWS_RESOURCE_TYPES:
-                            attrs = AWS_RESOURCE_TYPES[resource_type]
-                            label = f"{attrs['label']}\n{resources[member_id]['name']}"
-                            c.node(member_id, label=label, shape=attrs['shape'], 
-                                  style='filled', fillcolor=attrs['color'])
-    
-    # Add any resources not in containers
-    contained_resources = set()
-    for container_members in containers.values():
-        contained_resources.update(container_members)
+    # Nest each resource inside a single container, containers inside containers
+    parents = build_containment_tree(containers)
+    children = defaultdict(list)
+    for resource_id in resources:
+        children[parents.get(resource_id)].append(resource_id)
     
-    for resource_id, resource in resources.items():
-        if resource_id not in contained_resources and resource_id not in containers:
-            resource_type = resource['type']
-            if resource_type in AWS_RESOURCE_TYPES:
-                attrs = AWS_RESOURCE_TYPES[resource_type]
-                label = f"{attrs['label']}\n{resource['name']}"
-                dot.node(resource_id, label=label, shape=attrs['shape'], 
-                         style='filled', fillcolor=attrs['color'])
+    def add_resource(graph, resource_id):
+        resource_type = resources[resource_id]['type']
+        if resource_type not in AWS_RESOURCE_TYPES:
+            return
+        attrs = AWS_RESOURCE_TYPES[resource_type]
+        label = f"{attrs['label']}\n{resources[resource_id]['name']}"
+        
+        if not children.get(resource_id):
+            graph.node(resource_id, label=label, shape=attrs['shape'], 
+                       style='filled', fillcolor=attrs['color'])
+            return
+        
+        # Containers with members become clusters holding their own node too,
+        # so edges to the container land inside it
+        with graph.subgraph(name=f"cluster_{resource_id}") as c:
+            c.attr(label=f"{attrs['label']}: {resources[resource_id]['name']}", style='filled', color='#333333', 
+                   fillcolor=f"{attrs['color']}20", fontsize='14', fontcolor='#333333', penwidth='2')
+            c.node(resource_id, label=label, shape=attrs['shape'], 
+                   style='filled', fillcolor=attrs['color'])
+            for member_id in children[resource_id]:
+                add_resource(c, member_id)
+    
+    # Add top-level resources, which recursively add everything nested in them
+    for resource_id in children[None]:
+        add_resource(dot, resource_id)
     
     # Add edges between resources with xlabels
     for source_id, target_id, rel_type in relationships:
         # Only show connections if they're not containment relationships
-        if rel_type not in ['contains', 'hosts', 'runs'] or (source_id not in containers or target_id not in containers[source_id]):
+        if rel_type not in CONTAINMENT_RELATIONSHIPS or parents.get(target_id) != source_id:
             # Customize edge style based on relationship type
             if rel_type == 'references':
                 dot.edge(source_id, target_id, style="dashed", xlabel="")
@@ -434,12 +1050,20 @@ def main():
     parser.add_argument('-o', '--output', default='aws_diagram', help='Output file name (without extension)')
     parser.add_argument('--debug', action='store_true', help='Enable debug output')
     parser.add_argument('--style', choices=['default', 'aws'], default='aws', help='Diagram style (default or aws-style)')
+    parser.add_argument('--workers', type=int, help='Processes used to parse Terraform files (default: CPU count)')
+    parser.add_argument('--cache', help=f'File caching parsed Terraform between runs '
+                                        f'(default: {DEFAULT_PARSE_CACHE} in the scanned directory)')
+    parser.add_argument('--no-cache', action='store_true', help='Parse every file again and do not write the cache')
     args = parser.parse_args()
     
     print(f"Analyzing Terraform files in: {args.directory}")
     
     # Parse Terraform files
-    resources = parse_terraform_files(args.directory)
+    resources, scopes = build_terraform_graph(
+        args.directory,
+        cache_file=None if args.no_cache else args.cache or os.path.join(args.directory, DEFAULT_PARSE_CACHE),
+        max_workers=args.workers
+    )
     print(f"Found {len(resources)} resources")
     
     # Debug output
@@ -449,7 +1073,7 @@ def main():
             print(f"  {resource_id} ({resource['file']})")
     
     # Extract relationships between resources
-    relationships = extract_relationships(resources)
+    relationships = extract_relationships(resources, scopes)
     print(f"Found {len(relationships)} relationships between resources")
     
     # Debug output
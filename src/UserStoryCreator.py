@@ -1,13 +1,39 @@
 import logging
 from pathlib import Path
 from jira import JIRA, JIRAError
-from typing import List, Optional, Dict
+from requests.exceptions import ConnectionError as RequestsConnectionError, ConnectTimeout, Timeout
+from urllib3.exceptions import NewConnectionError
+from typing import List, Optional, Dict, Callable, TypeVar, Iterable, Iterator, Tuple, Any
 import os
 from dotenv import load_dotenv
+from jira_session import create_jira_client
 from dataclasses import dataclass, field
 import json
+import json.decoder
+import json.scanner
+import bisect
+import re
+import hashlib
 from getpass import getpass
 import time
+import math
+import argparse
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+try:
+    import ijson
+except ImportError:  # Optional: only needed to stream large input files
+    ijson = None
+
+T = TypeVar('T')
+
+# Errors raised for a failed request; jira only wraps HTTP error responses
+# in JIRAError, dropped connections and timeouts surface from requests
+REQUEST_ERRORS = (JIRAError, RequestsConnectionError, Timeout)
 
 # Configure logging
 logging.basicConfig(
@@ -26,8 +52,19 @@ class JiraConfig:
     project_key: str
     epic_link_field: str = field(default="customfield_10014")
     acceptance_criteria_field: str = field(default="customfield_10155")
+    epic_link_field_name: str = field(default="Epic Link")
+    acceptance_criteria_field_name: str = field(default="Acceptance Criteria")
+    metadata_cache_file: Optional[str] = field(default=".jira_metadata_cache.json")
+    metadata_cache_ttl: int = field(default=86400)
     max_retries: int = field(default=3)
     retry_delay: int = field(default=5)
+    bulk_batch_size: int = field(default=50)
+    max_workers: int = field(default=1)
+    max_retry_delay: float = field(default=60.0)
+    requests_per_second: float = field(default=10.0)
+    burst_size: int = field(default=10)
+    connect_timeout: float = field(default=5.0)
+    read_timeout: float = field(default=30.0)
 
     def __post_init__(self):
         """Validate configuration parameters"""
@@ -41,6 +78,143 @@ class JiraConfig:
         missing = [name for name, value in required.items() if not value]
         if missing:
             raise ValueError(f"Missing required configuration: {', '.join(missing)}")
+        
+        if not 1 <= self.bulk_batch_size <= 50:
+            raise ValueError("bulk_batch_size must be between 1 and 50")
+        
+        if self.max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        
+        if self.requests_per_second <= 0 or self.burst_size < 1:
+            raise ValueError("requests_per_second and burst_size must be positive")
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every worker of a client"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        
+    def acquire(self) -> None:
+        """Block until a token is available, then consume it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Drain the bucket so all workers back off for ``seconds``"""
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+            self._updated = time.monotonic()
+
+class RetryScheduler:
+    """
+    Shared retry/backoff policy for Jira requests
+    
+    Every attempt first takes a token from a global bucket. Rate-limited
+    (429), server-side (5xx) and connection errors are retried with
+    exponential backoff and full jitter, honoring ``Retry-After`` when the
+    server sends one. Any other client error is fatal and raised at once.
+    
+    Requests that are not idempotent, such as issue creation, are only
+    retried after a connection error when the request certainly never
+    reached Jira. A read timeout or a connection dropped mid-request is
+    raised at once, so the caller can check whether the issue exists
+    before sending it again.
+    """
+    
+    def __init__(self, config: JiraConfig):
+        self.config = config
+        self.bucket = TokenBucket(config.requests_per_second, config.burst_size)
+        
+    @staticmethod
+    def request_not_sent(error: Exception) -> bool:
+        """Whether a failed request never reached the server (connect timeout or refused)"""
+        if isinstance(error, ConnectTimeout):
+            return True
+        if isinstance(error, RequestsConnectionError) and error.args:
+            # requests wraps urllib3's MaxRetryError, whose reason is the connect failure
+            reason = getattr(error.args[0], 'reason', error.args[0])
+            return isinstance(reason, NewConnectionError)
+        return False
+
+    @staticmethod
+    def is_retryable(error: Exception, idempotent: bool = True) -> bool:
+        """Classify an error as retryable (True) or fatal (False)"""
+        if isinstance(error, (RequestsConnectionError, Timeout)):
+            return idempotent or RetryScheduler.request_not_sent(error)
+        status = getattr(error, 'status_code', None)
+        if status is None:
+            return True
+        return status == 429 or status >= 500
+
+    @staticmethod
+    def retry_after(error: Exception) -> Optional[float]:
+        """Seconds requested by the server's Retry-After header, if any"""
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        value = headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given attempt"""
+        ceiling = min(self.config.max_retry_delay, self.config.retry_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def call(self, func: Callable[[], T], description: str, idempotent: bool = True) -> T:
+        """
+        Run ``func`` under the rate limit, retrying transient failures
+        
+        Args:
+            func: Zero-argument callable performing one Jira request
+            description: Short label used in log messages
+            idempotent: Whether repeating the request is harmless; if not,
+                ambiguous connection failures are raised instead of retried
+            
+        Returns:
+            Whatever ``func`` returns
+            
+        Raises:
+            JIRAError: On a fatal error or once retries are exhausted
+            requests.exceptions.ConnectionError, Timeout: Once retries are exhausted
+        """
+        for attempt in range(1, self.config.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return func()
+            except REQUEST_ERRORS as e:
+                if not self.is_retryable(e, idempotent) or attempt == self.config.max_retries:
+                    raise
+                
+                delay = self.retry_after(e)
+                if delay is not None:
+                    # The limit applies to the whole account, so every worker waits
+                    self.bucket.pause(delay)
+                else:
+                    delay = self.backoff(attempt)
+                logger.warning(f"{description} attempt {attempt} failed: {e}; retrying in {delay:.1f}s")
+                time.sleep(delay)
+                
+        raise RuntimeError(f"{description} failed after retries")
 
 class JiraDataParser:
     """Handles parsing and validation of input data"""
@@ -76,47 +250,733 @@ class JiraDataParser:
         except Exception as e:
             raise RuntimeError(f"Error reading file: {e}")
 
+    @staticmethod
+    def iter_epics(file_path: str) -> Iterator[Dict]:
+        """
+        Stream epics from a JSON file one at a time
+        
+        Each epic is validated as soon as it has been read, so creation can
+        start before the rest of the file is parsed and memory use is
+        bounded by the largest single epic. Falls back to ``load_from_file``
+        when ijson is not installed.
+        
+        Args:
+            file_path: Path to JSON file
+            
+        Yields:
+            Validated epic dictionaries, in file order
+            
+        Raises:
+            ValueError: On invalid JSON or an epic that does not match the schema
+            FileNotFoundError: If file doesn't exist
+        """
+        if ijson is None:
+            logger.warning("ijson is not installed; loading the whole file into memory")
+            for index, epic in enumerate(JiraDataParser.load_from_file(file_path)['epics']):
+                JiraDataParser.validate_epic(epic, index)
+                yield epic
+            return
+        
+        count = 0
+        with open(file_path, 'rb') as file:
+            try:
+                for epic in ijson.items(file, 'epics.item'):
+                    JiraDataParser.validate_epic(epic, count)
+                    count += 1
+                    yield epic
+            except ijson.JSONError as e:
+                raise ValueError(f"Invalid JSON format after epic {count}: {e}")
+        
+        if count == 0:
+            raise ValueError("Invalid JSON structure - missing or empty 'epics' key")
+
+    @staticmethod
+    def validate_epic(epic: Dict, index: int) -> None:
+        """
+        Check one epic and its stories against the input schema
+        
+        Raises:
+            ValueError: Listing every problem found in the epic
+        """
+        problems = JiraDataParser.epic_problems(epic, index)
+        if problems:
+            raise ValueError("; ".join(problems))
+
+    @staticmethod
+    def epic_problems(epic: Any, index: int, lines: Optional[Dict[int, int]] = None) -> List[str]:
+        """
+        Collect every schema problem in one epic and its stories
+        
+        Args:
+            epic: Parsed epic object
+            index: Position of the epic in the 'epics' list
+            lines: Optional map of ``id(obj)`` to source line, from ``_load_with_lines``
+            
+        Returns:
+            Human-readable problems, empty if the epic is valid
+        """
+        lines = lines or {}
+        
+        def where(obj: Any, label: str) -> str:
+            line = lines.get(id(obj))
+            return f"line {line}: {label}" if line else label
+        
+        if not isinstance(epic, dict):
+            return [f"{where(epic, f'Epic {index}')}: expected an object"]
+        
+        problems = []
+        epic_label = where(epic, f"Epic {index}")
+        for name in ('title', 'description'):
+            if name not in epic:
+                problems.append(f"{epic_label}: missing '{name}'")
+            elif not isinstance(epic[name], str):
+                problems.append(f"{epic_label}: '{name}' must be a string")
+        
+        stories = epic.get('user_stories')
+        if not isinstance(stories, list):
+            problems.append(f"{epic_label}: 'user_stories' must be a list")
+            return problems
+        
+        for story_index, story in enumerate(stories):
+            story_label = where(story, f"Epic {index}, story {story_index}")
+            if not isinstance(story, dict):
+                problems.append(f"{story_label}: expected an object")
+                continue
+            for name in ('title', 'description', 'acceptance_criteria'):
+                if name not in story:
+                    problems.append(f"{story_label}: missing '{name}'")
+                elif not isinstance(story[name], str):
+                    problems.append(f"{story_label}: '{name}' must be a string")
+        
+        return problems
+
+    @staticmethod
+    def _load_with_lines(text: str) -> Tuple[Any, Dict[int, int]]:
+        """
+        Parse JSON text, recording the source line of every object
+        
+        Uses the pure-Python scanner with a hooked object parser, so each
+        object's starting line is known without a second pass over the text.
+        
+        Returns:
+            Parsed data and a map of ``id(obj)`` to 1-based line number
+        """
+        newlines = [match.start() for match in re.finditer('\n', text)]
+        lines: Dict[int, int] = {}
+        decoder = json.JSONDecoder()
+        
+        def parse_object(s_and_end, *args):
+            obj, end = json.decoder.JSONObject(s_and_end, *args)
+            # s_and_end points just past the opening brace
+            lines[id(obj)] = bisect.bisect_left(newlines, s_and_end[1] - 1) + 1
+            return obj, end
+        
+        decoder.parse_object = parse_object
+        decoder.scan_once = json.scanner.py_make_scanner(decoder)
+        return decoder.decode(text), lines
+
+    @staticmethod
+    def data_problems(data: Any, lines: Optional[Dict[int, int]] = None) -> List[str]:
+        """
+        Collect every schema problem in already parsed input data
+        
+        Args:
+            data: Parsed JSON document
+            lines: Optional map of ``id(obj)`` to source line, from ``_load_with_lines``
+            
+        Returns:
+            Human-readable problems, empty if the data is valid
+        """
+        lines = lines or {}
+        if not isinstance(data, dict) or 'epics' not in data:
+            return ["Invalid JSON structure - missing 'epics' key"]
+        if not isinstance(data['epics'], list):
+            return [f"line {lines.get(id(data), 1)}: 'epics' must be a list"]
+        
+        problems = []
+        for index, epic in enumerate(data['epics']):
+            problems.extend(JiraDataParser.epic_problems(epic, index, lines))
+        return problems
+
+    @staticmethod
+    def _stream_problems(file_path: str) -> List[str]:
+        """
+        Validate a file epic by epic with ijson, without loading it whole
+        
+        Returns:
+            Problems without line numbers, or a single entry if the file is
+            not valid JSON or has no epics to stream
+        """
+        problems = []
+        count = 0
+        with open(file_path, 'rb') as file:
+            try:
+                for epic in ijson.items(file, 'epics.item'):
+                    problems.extend(JiraDataParser.epic_problems(epic, count))
+                    count += 1
+            except ijson.JSONError as e:
+                return [f"invalid JSON: {e}"]
+        
+        if count == 0:
+            return ["no epics found"]
+        return problems
+
+    @staticmethod
+    def validate_file(file_path: str) -> List[str]:
+        """
+        Validate a whole input file without touching Jira
+        
+        Reports every schema problem with its epic/story index and line
+        number, so a bad file is rejected before any issue is created. An
+        empty 'epics' list is reported too, as there is nothing to import.
+        
+        With ijson installed a valid file is checked in one streaming pass,
+        so memory stays flat and validation costs about one extra read of
+        the file before creation streams it again. Only when that pass finds
+        a problem is the file parsed whole with ``_load_with_lines`` to add
+        line numbers. Without ijson the whole file is always parsed that way.
+        
+        Args:
+            file_path: Path to JSON file
+            
+        Returns:
+            Human-readable problems, empty if the file is valid
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist
+        """
+        if ijson is not None and not JiraDataParser._stream_problems(file_path):
+            return []
+        
+        with open(file_path, 'r', encoding='utf-8') as file:
+            text = file.read()
+        
+        try:
+            data, lines = JiraDataParser._load_with_lines(text)
+        except json.JSONDecodeError as e:
+            return [f"line {e.lineno} column {e.colno}: invalid JSON: {e.msg}"]
+        
+        problems = JiraDataParser.data_problems(data, lines)
+        if not problems and not data['epics']:
+            # iter_epics refuses a file with nothing to import
+            problems.append(f"line {lines.get(id(data), 1)}: 'epics' must not be empty")
+        return problems
+
+class ImportJournal:
+    """
+    Append-only JSONL record of issues created by an import
+    
+    Each line maps a content hash of an epic or story to the key Jira
+    returned for it. Re-running an import with the same journal skips
+    everything already recorded and resumes where the last run stopped.
+    """
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        
+        if self.path.exists():
+            with open(self.path, 'r') as file:
+                for line_number, line in enumerate(file, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        self._keys[entry['hash']] = entry['key']
+                    except (json.JSONDecodeError, KeyError):
+                        # A crash mid-write can leave a truncated last line
+                        logger.warning(f"Ignoring malformed journal line {line_number} in {self.path}")
+            logger.info(f"Loaded {len(self._keys)} journal entries from {self.path}")
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def content_hash(*parts: str) -> str:
+        """Stable hash identifying an epic or story by its content"""
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """Return the issue key recorded for ``content_hash``, if any"""
+        return self._keys.get(content_hash)
+
+    def record(self, content_hash: str, issue_key: str, kind: str) -> None:
+        """Durably record that ``issue_key`` was created for ``content_hash``"""
+        with self._lock:
+            with open(self.path, 'a') as file:
+                file.write(json.dumps({'hash': content_hash, 'key': issue_key, 'kind': kind}) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+            self._keys[content_hash] = issue_key
+
+class ExistingIssueIndex:
+    """
+    In-memory index of a project's epics and stories
+    
+    Issues are keyed by (scope, issue type, summary), where the scope is
+    the parent key for epics and the epic key for stories.
+    """
+    
+    def __init__(self):
+        self._issues: Dict[tuple, object] = {}
+        
+    def __len__(self) -> int:
+        return len(self._issues)
+
+    @staticmethod
+    def _key(scope: Optional[str], issue_type: str, summary: str) -> tuple:
+        return (scope, issue_type, summary.strip().casefold())
+
+    def add(self, scope: Optional[str], issue_type: str, summary: str, issue) -> None:
+        """Index ``issue`` under its scope, type and summary"""
+        self._issues.setdefault(self._key(scope, issue_type, summary), issue)
+
+    def find(self, scope: Optional[str], issue_type: str, summary: str):
+        """Return the indexed issue matching scope, type and summary, if any"""
+        return self._issues.get(self._key(scope, issue_type, summary))
+
+    def match(self, issue_dict: Dict, epic_link_field: str):
+        """Return the indexed issue an issue payload would duplicate, if any"""
+        issue_type = issue_dict['issuetype']['name']
+        if issue_type == 'Epic':
+            scope = issue_dict['parent']['key']
+        else:
+            scope = issue_dict[epic_link_field]
+        return self.find(scope, issue_type, issue_dict['summary'])
+
+class ImportPlanner:
+    """
+    Builds the issue payloads an import would send, without touching Jira
+    
+    ``JiraStoryCreator`` uses the same builders, so a dry-run plan matches
+    what a real run submits field for field once ``resolve_fields`` has
+    been applied with the instance's metadata.
+    """
+    
+    # Issues per search page when loading existing issues for deduplication
+    SEARCH_PAGE_SIZE = 100
+    
+    def __init__(self, config: JiraConfig):
+        self.config = config
+        
+    def resolve_fields(self, metadata: Dict) -> None:
+        """
+        Resolve custom field IDs by name and check the required issue types
+        
+        A configured field ID that exists on the instance is kept;
+        otherwise the field is looked up by its name and the config is
+        updated, so a wrong ID fails (or is corrected) before any payload
+        is built.
+        
+        Args:
+            metadata: Dictionary with 'fields' (ID to name) and 'issue_types'
+            
+        Raises:
+            ValueError: If a field cannot be resolved or Epic/Story is not
+                available in the project
+        """
+        ids_by_name = {name.casefold(): field_id for field_id, name in metadata['fields'].items()}
+        for attr, name_attr in (('epic_link_field', 'epic_link_field_name'),
+                                ('acceptance_criteria_field', 'acceptance_criteria_field_name')):
+            field_id = getattr(self.config, attr)
+            if field_id in metadata['fields']:
+                continue
+            
+            field_name = getattr(self.config, name_attr)
+            resolved = ids_by_name.get(field_name.casefold())
+            if resolved is None:
+                raise ValueError(f"Field '{field_id}' does not exist and no field is named '{field_name}'")
+            logger.info(f"Resolved '{field_name}' to {resolved} (configured {field_id} does not exist)")
+            setattr(self.config, attr, resolved)
+        
+        missing_types = {'Epic', 'Story'} - set(metadata['issue_types'])
+        if missing_types:
+            raise ValueError(
+                f"Project {self.config.project_key} has no issue type(s): {', '.join(sorted(missing_types))}"
+            )
+
+    def build_epic_dict(self, title: str, description: str, parent_key: str) -> Dict:
+        """Build the issue fields for an epic"""
+        return {
+            'project': {'key': self.config.project_key},
+            'summary': title,
+            'description': description,
+            'issuetype': {'name': 'Epic'},
+            'parent': {'key': parent_key}
+        }
+
+    def build_story_dict(self,
+                         title: str,
+                         description: str,
+                         acceptance_criteria: str,
+                         epic_key: str) -> Dict:
+        """Build the issue fields for a user story"""
+        return {
+            'project': {'key': self.config.project_key},
+            'summary': title,
+            'description': description,
+            self.config.acceptance_criteria_field: acceptance_criteria,
+            'issuetype': {'name': 'Story'},
+            self.config.epic_link_field: epic_key
+        }
+
+    def plan(self, epics: Iterable[Dict], parent_key: str) -> Iterator[Dict]:
+        """
+        Yield one plan entry per issue, in creation order
+        
+        Story epic links hold a ``<epic N>`` placeholder, since epic keys
+        only exist once Jira has created them.
+        
+        Args:
+            epics: Epic dictionaries with their user stories
+            parent_key: Parent issue key for the epics
+            
+        Yields:
+            Dictionaries with 'kind', 'source' and 'fields'
+        """
+        for epic_index, epic in enumerate(epics):
+            yield {
+                'kind': 'epic',
+                'source': f"epic {epic_index}",
+                'fields': self.build_epic_dict(epic['title'], epic['description'], parent_key)
+            }
+            for story_index, story in enumerate(epic['user_stories']):
+                yield {
+                    'kind': 'story',
+                    'source': f"epic {epic_index} story {story_index}",
+                    'fields': self.build_story_dict(
+                        story['title'],
+                        story['description'],
+                        story['acceptance_criteria'],
+                        f"<epic {epic_index}>"
+                    )
+                }
+
+    def estimate(self,
+                 epic_count: int,
+                 story_count: int,
+                 bulk: bool = False,
+                 dedupe: bool = False,
+                 latency: float = 0.5,
+                 metadata_cached: bool = False) -> Dict[str, float]:
+        """
+        Estimate API calls and wall time for an import
+        
+        Throughput is bounded both by ``max_workers`` requests in flight at
+        ``latency`` seconds each and by ``requests_per_second``. Every
+        phase that must wait for the previous one (epics before stories)
+        adds at least one round-trip. Setup calls every run makes (session,
+        field and issue type metadata, parent lookup) run one after another
+        and are counted separately.
+        
+        Args:
+            epic_count: Number of epics to create
+            story_count: Number of stories to create
+            bulk: Whether the bulk-create endpoint is used
+            dedupe: Whether existing issues are searched first
+            latency: Assumed seconds per request
+            metadata_cached: Whether field metadata comes from the on-disk cache
+            
+        Returns:
+            Dictionary with 'api_calls', 'setup_calls' and 'seconds'
+        """
+        if bulk:
+            phases = [
+                math.ceil(epic_count / self.config.bulk_batch_size),
+                math.ceil(story_count / self.config.bulk_batch_size)
+            ]
+        elif self.config.max_workers > 1:
+            phases = [epic_count, story_count]
+        else:
+            phases = [epic_count + story_count]
+        if dedupe:
+            # Size of the project is unknown offline; assume it holds this import
+            phases.insert(0, math.ceil((epic_count + story_count) / self.SEARCH_PAGE_SIZE) or 1)
+        
+        concurrency = self.config.max_workers if (bulk or self.config.max_workers > 1) else 1
+        throughput = min(concurrency / latency, self.config.requests_per_second)
+        seconds = sum(max(calls / throughput, latency) for calls in phases if calls)
+        
+        # Session, then fields and issue types unless cached, then the parent lookup
+        setup_calls = 1 + (0 if metadata_cached else 2) + 1
+        return {
+            'api_calls': sum(phases) + setup_calls,
+            'setup_calls': setup_calls,
+            'seconds': seconds + setup_calls * latency
+        }
+
+class FieldMetadataCache:
+    """
+    On-disk cache of per-instance field and issue type metadata
+    
+    Entries are keyed by Jira URL and project and expire after ``ttl``
+    seconds, so repeated runs against a known instance skip the metadata
+    calls entirely.
+    """
+    
+    def __init__(self, path: Optional[str], ttl: int):
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        
+    @staticmethod
+    def key_for(config: JiraConfig) -> str:
+        """Cache key for the instance and project in ``config``"""
+        return f"{config.url.rstrip('/')}|{config.project_key}"
+        
+    def _read_all(self) -> Dict:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r') as file:
+                return json.load(file)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable metadata cache {self.path}: {e}")
+            return {}
+
+    def get(self, cache_key: str) -> Optional[Dict]:
+        """Return the cached metadata for ``cache_key`` if it has not expired"""
+        entry = self._read_all().get(cache_key)
+        if entry and time.time() - entry.get('fetched_at', 0) < self.ttl:
+            return entry
+        return None
+
+    def put(self, cache_key: str, metadata: Dict) -> None:
+        """Store ``metadata`` for ``cache_key`` with the current timestamp"""
+        if self.path is None:
+            return
+        entries = self._read_all()
+        entries[cache_key] = {**metadata, 'fetched_at': time.time()}
+        try:
+            with open(self.path, 'w') as file:
+                json.dump(entries, file, indent=2)
+        except OSError as e:
+            logger.warning(f"Could not write metadata cache {self.path}: {e}")
+
 class JiraClient:
     """Handles Jira API interactions with retry logic"""
     
+    # How far back to look for issues whose create response was lost, in JQL
+    LOST_RESPONSE_WINDOW = '15m'
+    
     def __init__(self, config: JiraConfig):
         self.config = config
+        self.scheduler = RetryScheduler(config)
         self.jira = self._connect()
         
     def _connect(self) -> JIRA:
         """Establish Jira connection with retry logic"""
-        for attempt in range(1, self.config.max_retries + 1):
-            try:
-                return JIRA(
-                    server=self.config.url,
-                    basic_auth=(self.config.email, self.config.api_key),
-                    timeout=10
-                )
-            except JIRAError as e:
-                if attempt == self.config.max_retries:
-                    raise
-                logger.warning(f"Connection attempt {attempt} failed: {e}")
-                time.sleep(self.config.retry_delay)
-                
-        raise RuntimeError("Failed to establish Jira connection")
+        # Retries, including of dropped connections and timeouts, are handled
+        # by the scheduler, so the library's own are disabled
+        return self.scheduler.call(
+            lambda: create_jira_client(
+                self.config.url,
+                self.config.email,
+                self.config.api_key,
+                pool_size=self.config.max_workers,
+                connect_timeout=self.config.connect_timeout,
+                read_timeout=self.config.read_timeout,
+                max_retries=0
+            ),
+            "Connection"
+        )
+
+    def _search_issue_index(self, jql: str, page_size: int = 100) -> ExistingIssueIndex:
+        """
+        Index the epics and stories matched by ``jql`` with a paginated search
+        
+        Only the fields needed to match issues are requested.
+        
+        Args:
+            jql: Query selecting the issues to index
+            page_size: Issues requested per search page
+            
+        Returns:
+            Index of the matched epics and stories
+        """
+        fields = ['summary', 'issuetype', 'parent', self.config.epic_link_field]
+        index = ExistingIssueIndex()
+        start_at = 0
+        
+        while True:
+            page = self.scheduler.call(
+                lambda: self.jira.search_issues(jql, startAt=start_at, maxResults=page_size, fields=fields),
+                "Search existing issues"
+            )
+            for issue in page:
+                issue_type = issue.fields.issuetype.name
+                parent = getattr(issue.fields, 'parent', None)
+                parent_key = parent.key if parent else None
+                if issue_type == 'Epic':
+                    scope = parent_key
+                else:
+                    scope = getattr(issue.fields, self.config.epic_link_field, None) or parent_key
+                index.add(scope, issue_type, issue.fields.summary or '', issue)
+            
+            start_at += len(page)
+            if not page or start_at >= page.total:
+                break
+        
+        return index
+
+    def _find_created(self, issue_dicts: List[Dict]) -> List[Any]:
+        """
+        Look up issues a create request may have made before its response was lost
+        
+        Searches the project's recently created epics and stories, so a
+        create that timed out after Jira committed it is not sent again.
+        
+        Returns:
+            The matching issue, or None, for each of ``issue_dicts``
+        """
+        jql = (f'project = "{self.config.project_key}" AND issuetype in (Epic, Story) '
+               f'AND created >= -{self.LOST_RESPONSE_WINDOW}')
+        index = self._search_issue_index(jql)
+        return [index.match(issue_dict, self.config.epic_link_field) for issue_dict in issue_dicts]
 
     def _create_issue_with_retry(self, issue_dict: Dict) -> str:
-        """Create issue with retry logic"""
+        """
+        Create issue with retry logic
+        
+        When the response is lost (read timeout or dropped connection), the
+        issue is looked up first and only created again if it does not exist.
+        """
         for attempt in range(1, self.config.max_retries + 1):
             try:
-                issue = self.jira.create_issue(fields=issue_dict)
+                issue = self.scheduler.call(
+                    lambda: self.jira.create_issue(fields=issue_dict),
+                    "Create issue",
+                    idempotent=False
+                )
                 return issue.key
-            except JIRAError as e:
+            except (RequestsConnectionError, Timeout) as e:
+                existing = self._find_created([issue_dict])[0]
+                if existing is not None:
+                    logger.info(f"'{issue_dict['summary']}' was created as {existing.key} before {e}")
+                    return existing.key
                 if attempt == self.config.max_retries:
                     raise
-                logger.warning(f"Create issue attempt {attempt} failed: {e}")
-                time.sleep(self.config.retry_delay)
+                logger.warning(f"Create issue attempt {attempt} failed: {e}; '{issue_dict['summary']}' "
+                               f"does not exist, creating it again")
+        
+        raise RuntimeError("Create issue failed after retries")
+
+    def _create_issues_bulk_with_retry(self,
+                                       issue_dicts: List[Dict],
+                                       sources: Optional[List[str]] = None,
+                                       on_created: Optional[Callable[[int, str], None]] = None) -> List[str]:
+        """
+        Create issues through the bulk-create endpoint
+        
+        Issues are submitted in batches of ``bulk_batch_size``. Items the
+        bulk endpoint rejects are retried one by one through
+        ``_create_issue_with_retry`` so a single bad issue does not fail
+        the whole batch.
+        
+        Args:
+            issue_dicts: Issue field dictionaries, in creation order
+            sources: Optional description of each item's origin, used in errors
+            on_created: Optional callback receiving (index, key) as soon as
+                each issue exists, even if a later batch fails
+            
+        Returns:
+            Created issue keys in the same order as ``issue_dicts``
+        """
+        batch_size = self.config.bulk_batch_size
+        starts = range(0, len(issue_dicts), batch_size)
+        
+        def create_batch(start: int) -> List[str]:
+            batch = issue_dicts[start:start + batch_size]
+            try:
+                results = self._submit_bulk_batch(batch)
+            except (RequestsConnectionError, Timeout) as e:
+                # Jira may have created part of the batch; the rest is created one by one
+                logger.warning(f"Bulk create response lost ({e}); checking which issues exist")
+                results = [{'status': 'Success', 'issue': issue} if issue is not None
+                           else {'status': 'Error', 'error': str(e)}
+                           for issue in self._find_created(batch)]
+            keys = []
+            
+            for offset, (issue_dict, result) in enumerate(zip(batch, results)):
+                if result.get('status') == 'Success':
+                    key = result['issue'].key
+                else:
+                    source = sources[start + offset] if sources else f"item {start + offset}"
+                    logger.warning(
+                        f"Bulk create failed for {source} "
+                        f"'{issue_dict.get('summary')}': {result.get('error')}"
+                    )
+                    try:
+                        key = self._create_issue_with_retry(issue_dict)
+                    except JIRAError as e:
+                        logger.error(f"Failed to create {source} '{issue_dict.get('summary')}': {e}")
+                        raise
                 
-        raise RuntimeError("Failed to create issue after retries")
+                keys.append(key)
+                if on_created is not None:
+                    on_created(start + offset, key)
+                    
+            return keys
+        
+        # Batches are independent, so they can be in flight together;
+        # map() keeps results in submission order
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+            batch_keys = list(executor.map(create_batch, starts))
+        
+        return [key for keys in batch_keys for key in keys]
+
+    def _submit_bulk_batch(self, batch: List[Dict]) -> List[Dict]:
+        """Submit one bulk-create request with retry logic"""
+        return self.scheduler.call(
+            lambda: self.jira.create_issues(field_list=batch, prefetch=False),
+            "Bulk create",
+            idempotent=False
+        )
 
 class JiraStoryCreator(JiraClient):
     """Handles creation of Jira epics and user stories"""
     
+    def __init__(self, config: JiraConfig):
+        super().__init__(config)
+        self.planner = ImportPlanner(config)
+        self.resolve_field_metadata()
+        self.existing_issues: Optional[ExistingIssueIndex] = None
+        self.on_existing = 'skip'
+        
+    def _fetch_field_metadata(self) -> Dict:
+        """Fetch field names and the project's issue types from Jira"""
+        fields = self.scheduler.call(self.jira.fields, "Fetch fields")
+        issue_types = self.scheduler.call(
+            lambda: self.jira.project_issue_types(self.config.project_key, maxResults=100),
+            "Fetch issue types"
+        )
+        return {
+            'fields': {field_info['id']: field_info['name'] for field_info in fields},
+            'issue_types': [issue_type.name for issue_type in issue_types]
+        }
+
+    def resolve_field_metadata(self) -> None:
+        """
+        Resolve custom field IDs by name and check the required issue types
+        
+        Metadata is fetched once and cached on disk, then applied with
+        ``ImportPlanner.resolve_fields``.
+        
+        Raises:
+            ValueError: If a field cannot be resolved or Epic/Story is not
+                available in the project
+        """
+        cache = FieldMetadataCache(self.config.metadata_cache_file, self.config.metadata_cache_ttl)
+        cache_key = FieldMetadataCache.key_for(self.config)
+        metadata = cache.get(cache_key)
+        if metadata is None:
+            metadata = self._fetch_field_metadata()
+            cache.put(cache_key, metadata)
+        else:
+            logger.info(f"Using cached field metadata for {cache_key}")
+        
+        self.planner.resolve_fields(metadata)
+
     def get_parent_id(self) -> str:
         """Prompt user for parent ID with validation"""
         while True:
@@ -128,10 +988,68 @@ class JiraStoryCreator(JiraClient):
     def _validate_issue(self, issue_key: str) -> bool:
         """Validate if issue exists and is accessible"""
         try:
-            return bool(self.jira.issue(issue_key))
+            return bool(self.scheduler.call(lambda: self.jira.issue(issue_key), "Validate issue"))
         except JIRAError:
             return False
 
+    def load_existing_issues(self, page_size: int = 100) -> ExistingIssueIndex:
+        """
+        Index every epic and story in the project with one paginated search
+        
+        Only the fields needed to match issues are requested, so a project
+        with a few thousand issues costs a handful of calls.
+        
+        Args:
+            page_size: Issues requested per search page
+            
+        Returns:
+            Index of existing epics and stories
+        """
+        jql = f'project = "{self.config.project_key}" AND issuetype in (Epic, Story)'
+        index = self._search_issue_index(jql, page_size)
+        
+        logger.info(f"Indexed {len(index)} existing epics and stories in {self.config.project_key}")
+        return index
+
+    def _use_existing(self, issue_dict: Dict) -> Optional[str]:
+        """
+        Match an issue about to be created against the existing-issue index
+        
+        Depending on ``on_existing`` the match is left alone ('skip') or
+        its remaining fields are overwritten from ``issue_dict`` ('update').
+        
+        Returns:
+            Key of the matching existing issue, or None to create a new one
+        """
+        if self.existing_issues is None:
+            return None
+        
+        issue = self.existing_issues.match(issue_dict, self.config.epic_link_field)
+        if issue is None:
+            return None
+        
+        issue_type = issue_dict['issuetype']['name']
+        if self.on_existing == 'update':
+            identity = {'project', 'issuetype', 'summary', 'parent', self.config.epic_link_field}
+            update_fields = {name: value for name, value in issue_dict.items() if name not in identity}
+            self.scheduler.call(lambda: issue.update(fields=update_fields), "Update issue")
+            logger.info(f"Updated existing {issue_type.lower()} {issue.key}: '{issue_dict['summary']}'")
+        else:
+            logger.info(f"Skipping {issue_type.lower()} '{issue_dict['summary']}', already exists as {issue.key}")
+        return issue.key
+
+    def _build_epic_dict(self, title: str, description: str, parent_key: str) -> Dict:
+        """Build the issue fields for an epic"""
+        return self.planner.build_epic_dict(title, description, parent_key)
+
+    def _build_story_dict(self,
+                          title: str,
+                          description: str,
+                          acceptance_criteria: str,
+                          epic_key: str) -> Dict:
+        """Build the issue fields for a user story"""
+        return self.planner.build_story_dict(title, description, acceptance_criteria, epic_key)
+
     def create_epic(self, title: str, description: str, parent_key: str) -> str:
         """
         Create a Jira epic
@@ -144,13 +1062,7 @@ class JiraStoryCreator(JiraClient):
         Returns:
             Created epic key
         """
-        issue_dict = {
-            'project': {'key': self.config.project_key},
-            'summary': title,
-            'description': description,
-            'issuetype': {'name': 'Epic'},
-            'parent': {'key': parent_key}
-        }
+        issue_dict = self._build_epic_dict(title, description, parent_key)
         
         try:
             return self._create_issue_with_retry(issue_dict)
@@ -175,14 +1087,7 @@ class JiraStoryCreator(JiraClient):
         Returns:
             Created story key
         """
-        issue_dict = {
-            'project': {'key': self.config.project_key},
-            'summary': title,
-            'description': description,
-            self.config.acceptance_criteria_field: acceptance_criteria,
-            'issuetype': {'name': 'Story'},
-            self.config.epic_link_field: epic_key
-        }
+        issue_dict = self._build_story_dict(title, description, acceptance_criteria, epic_key)
         
         try:
             return self._create_issue_with_retry(issue_dict)
@@ -190,72 +1095,497 @@ class JiraStoryCreator(JiraClient):
             logger.error(f"Failed to create story '{title}': {e}")
             raise
 
-    def create_from_json(self, json_data: Dict) -> List[str]:
+    @staticmethod
+    def _epic_hash(epic: Dict, parent_key: str) -> str:
+        """Journal hash for an epic under ``parent_key``"""
+        return ImportJournal.content_hash('epic', parent_key, epic['title'], epic['description'])
+
+    @staticmethod
+    def _story_hash(story: Dict, epic_hash: str) -> str:
+        """Journal hash for a story under the epic identified by ``epic_hash``"""
+        return ImportJournal.content_hash(
+            'story', epic_hash, story['title'], story['description'], story['acceptance_criteria']
+        )
+
+    def _ensure_epic(self,
+                     epic: Dict,
+                     parent_key: str,
+                     journal: Optional[ImportJournal]) -> str:
+        """Create an epic unless the journal or the project already has it"""
+        epic_hash = self._epic_hash(epic, parent_key)
+        if journal is not None:
+            existing = journal.get(epic_hash)
+            if existing:
+                logger.info(f"Skipping epic '{epic['title']}', already created as {existing}")
+                return existing
+        
+        existing = self._use_existing(self._build_epic_dict(epic['title'], epic['description'], parent_key))
+        if existing:
+            if journal is not None:
+                journal.record(epic_hash, existing, 'epic')
+            return existing
+        
+        epic_key = self.create_epic(epic['title'], epic['description'], parent_key)
+        if journal is not None:
+            journal.record(epic_hash, epic_key, 'epic')
+        return epic_key
+
+    def _ensure_story(self,
+                      story: Dict,
+                      epic_hash: str,
+                      epic_key: str,
+                      journal: Optional[ImportJournal]) -> str:
+        """Create a story unless the journal or the target epic already has it"""
+        story_hash = self._story_hash(story, epic_hash)
+        if journal is not None:
+            existing = journal.get(story_hash)
+            if existing:
+                logger.info(f"Skipping story '{story['title']}', already created as {existing}")
+                return existing
+        
+        existing = self._use_existing(self._build_story_dict(
+            story['title'],
+            story['description'],
+            story['acceptance_criteria'],
+            epic_key
+        ))
+        if existing:
+            if journal is not None:
+                journal.record(story_hash, existing, 'story')
+            return existing
+        
+        story_key = self.create_user_story(
+            story['title'],
+            story['description'],
+            story['acceptance_criteria'],
+            epic_key
+        )
+        if journal is not None:
+            journal.record(story_hash, story_key, 'story')
+        return story_key
+
+    def create_from_json(self,
+                         json_data: Dict,
+                         bulk: bool = False,
+                         journal: Optional[ImportJournal] = None,
+                         on_existing: Optional[str] = None) -> List[str]:
         """
         Create hierarchy from JSON data
         
+        The whole document is validated first, so bad input is rejected
+        before any issue is created.
+        
         Args:
             json_data: Structured data containing epics and stories
+            bulk: Use the bulk-create endpoint instead of one call per issue
+            journal: Optional journal used to skip issues created by a previous run
+            on_existing: 'skip' or 'update' issues whose summary already exists
+                under the same parent/epic; None disables duplicate detection
             
         Returns:
             List of created issue keys
+            
+        Raises:
+            ValueError: Listing every schema problem in ``json_data``
         """
-        created_issues = []
+        problems = JiraDataParser.data_problems(json_data)
+        if problems:
+            raise ValueError("; ".join(problems))
+        return self.create_from_epics(json_data['epics'], bulk, journal, on_existing)
+
+    def create_from_epics(self,
+                          epics: Iterable[Dict],
+                          bulk: bool = False,
+                          journal: Optional[ImportJournal] = None,
+                          on_existing: Optional[str] = None) -> List[str]:
+        """
+        Create hierarchy from an iterable of epics
+        
+        Epics are consumed lazily by the serial and concurrent paths, so an
+        iterator such as ``JiraDataParser.iter_epics`` starts creating
+        issues before the input is fully read. The bulk path needs the
+        whole input up front. Epics are not validated here: ``iter_epics``
+        checks each one as it is read, and ``JiraDataParser.validate_file``
+        checks a whole file before anything is created.
+        
+        Args:
+            epics: Epic dictionaries with their user stories
+            bulk: Use the bulk-create endpoint instead of one call per issue
+            journal: Optional journal used to skip issues created by a previous run
+            on_existing: 'skip' or 'update' issues whose summary already exists
+                under the same parent/epic; None disables duplicate detection
+            
+        Returns:
+            List of created issue keys
+        """
+        if on_existing not in (None, 'skip', 'update'):
+            raise ValueError("on_existing must be None, 'skip' or 'update'")
+        
         parent_key = self.get_parent_id()
         
+        # Reset on every call so an earlier call's index is never reused
+        self.on_existing = on_existing or 'skip'
+        self.existing_issues = self.load_existing_issues() if on_existing else None
+        
+        if bulk:
+            return self._create_from_json_bulk(list(epics), parent_key, journal)
+        if self.config.max_workers > 1:
+            return self._create_from_json_concurrent(epics, parent_key, journal)
+        
+        created_issues = []
+        
         try:
-            for epic in json_data['epics']:
-                epic_key = self.create_epic(
-                    epic['title'],
-                    epic['description'],
-                    parent_key
-                )
+            for epic in epics:
+                epic_hash = self._epic_hash(epic, parent_key)
+                epic_key = self._ensure_epic(epic, parent_key, journal)
                 created_issues.append(epic_key)
                 logger.info(f"Created epic: {epic_key}")
                 
                 for story in epic['user_stories']:
-                    story_key = self.create_user_story(
+                    story_key = self._ensure_story(story, epic_hash, epic_key, journal)
+                    created_issues.append(story_key)
+                    logger.info(f"Created story: {story_key} under {epic_key}")
+                    
+        except Exception as e:
+            logger.error(f"Aborting due to error: {e}")
+            raise
+        
+        return created_issues
+
+    def _create_from_json_concurrent(self,
+                                     epics: Iterable[Dict],
+                                     parent_key: str,
+                                     journal: Optional[ImportJournal] = None) -> List[str]:
+        """
+        Create hierarchy with up to ``max_workers`` requests in flight
+        
+        Epics are submitted as they are read; each epic's stories are
+        submitted once that epic's key is known, so a story is never created
+        before its epic. At most ``2 * max_workers`` epics and story groups
+        are pending at once, which keeps streamed input from being read
+        ahead unboundedly. Results are collected in input order, so the
+        returned list matches the serial path.
+        
+        Args:
+            epics: Epic dictionaries with their user stories
+            parent_key: Parent issue key for the epics
+            journal: Optional journal of issues created by a previous run
+            
+        Returns:
+            List of created issue keys, ordered as in ``create_from_json``
+        """
+        created_issues = []
+        window = 2 * self.config.max_workers
+        pending_epics = deque()
+        pending_stories = deque()
+        
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+            
+            def collect_stories() -> None:
+                epic_key, futures = pending_stories.popleft()
+                created_issues.append(epic_key)
+                for future in futures:
+                    story_key = future.result()
+                    created_issues.append(story_key)
+                    logger.info(f"Created story: {story_key} under {epic_key}")
+            
+            def collect_epic() -> None:
+                epic, epic_future = pending_epics.popleft()
+                epic_key = epic_future.result()
+                epic_hash = self._epic_hash(epic, parent_key)
+                logger.info(f"Created epic: {epic_key}")
+                pending_stories.append((epic_key, [
+                    executor.submit(self._ensure_story, story, epic_hash, epic_key, journal)
+                    for story in epic['user_stories']
+                ]))
+                while len(pending_stories) > window:
+                    collect_stories()
+            
+            try:
+                for epic in epics:
+                    pending_epics.append((epic, executor.submit(self._ensure_epic, epic, parent_key, journal)))
+                    while len(pending_epics) > window:
+                        collect_epic()
+                while pending_epics:
+                    collect_epic()
+                while pending_stories:
+                    collect_stories()
+                        
+            except Exception as e:
+                logger.error(f"Aborting due to error: {e}")
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        
+        return created_issues
+
+    def _create_from_json_bulk(self,
+                               epics: List[Dict],
+                               parent_key: str,
+                               journal: Optional[ImportJournal] = None) -> List[str]:
+        """
+        Create hierarchy using bulk requests: all epics first, then all stories
+        
+        Args:
+            epics: Epic dictionaries with their user stories
+            parent_key: Parent issue key for the epics
+            journal: Optional journal of issues created by a previous run
+            
+        Returns:
+            List of created issue keys, ordered as in ``create_from_json``
+        """
+        try:
+            epic_hashes = [self._epic_hash(epic, parent_key) for epic in epics]
+            epic_keys = self._create_pending_bulk(
+                epic_hashes,
+                [
+                    self._build_epic_dict(epic['title'], epic['description'], parent_key)
+                    for epic in epics
+                ],
+                [f"epic {index}" for index in range(len(epics))],
+                'epic',
+                journal
+            )
+            logger.info(f"Created {len(epic_keys)} epics")
+            
+            story_hashes = []
+            story_dicts = []
+            story_sources = []
+            for epic_index, (epic, epic_hash, epic_key) in enumerate(zip(epics, epic_hashes, epic_keys)):
+                for story_index, story in enumerate(epic['user_stories']):
+                    story_hashes.append(self._story_hash(story, epic_hash))
+                    story_dicts.append(self._build_story_dict(
                         story['title'],
                         story['description'],
                         story['acceptance_criteria'],
                         epic_key
-                    )
-                    created_issues.append(story_key)
-                    logger.info(f"Created story: {story_key} under {epic_key}")
-                    
+                    ))
+                    story_sources.append((epic_index, story_index))
+            
+            story_keys = self._create_pending_bulk(
+                story_hashes,
+                story_dicts,
+                [f"epic {e_idx} story {s_idx}" for e_idx, s_idx in story_sources],
+                'story',
+                journal
+            )
+            logger.info(f"Created {len(story_keys)} stories")
+                
         except Exception as e:
             logger.error(f"Aborting due to error: {e}")
             raise
         
+        created_issues = []
+        stories_by_epic: Dict[int, List[str]] = {}
+        for (epic_index, _), story_key in zip(story_sources, story_keys):
+            stories_by_epic.setdefault(epic_index, []).append(story_key)
+        for epic_index, epic_key in enumerate(epic_keys):
+            created_issues.append(epic_key)
+            created_issues.extend(stories_by_epic.get(epic_index, []))
+        
         return created_issues
 
-def load_config() -> JiraConfig:
-    """Load configuration from environment with fallback prompts"""
+    def _create_pending_bulk(self,
+                             hashes: List[str],
+                             issue_dicts: List[Dict],
+                             sources: List[str],
+                             kind: str,
+                             journal: Optional[ImportJournal]) -> List[str]:
+        """
+        Bulk create the items neither the journal nor the project has yet
+        
+        Returns:
+            Issue keys for every item, existing and new, in input order
+        """
+        keys: List[Optional[str]] = [
+            journal.get(content_hash) if journal is not None else None
+            for content_hash in hashes
+        ]
+        journaled = len(keys) - keys.count(None)
+        if journaled:
+            logger.info(f"Skipping {journaled} {kind} issues already in the journal")
+        
+        for index, key in enumerate(keys):
+            if key is None:
+                keys[index] = self._use_existing(issue_dicts[index])
+                if keys[index] and journal is not None:
+                    journal.record(hashes[index], keys[index], kind)
+        
+        pending = [index for index, key in enumerate(keys) if key is None]
+        
+        def record(pending_index: int, key: str) -> None:
+            index = pending[pending_index]
+            keys[index] = key
+            if journal is not None:
+                journal.record(hashes[index], key, kind)
+        
+        self._create_issues_bulk_with_retry(
+            [issue_dicts[index] for index in pending],
+            [sources[index] for index in pending],
+            on_created=record
+        )
+        
+        return keys
+
+def load_config(dry_run: bool = False) -> JiraConfig:
+    """
+    Load configuration from environment with fallback prompts
+    
+    With ``dry_run`` nothing is prompted for: missing connection settings
+    get placeholders, since a dry run never contacts Jira.
+    """
     # load_dotenv()
     load_dotenv(Path('.env'))
     
-    print(os.getenv('JIRA_API_KEY'))
+    if dry_run:
+        prompt = lambda _: 'dry-run'
+        secret_prompt = prompt
+    else:
+        prompt = input
+        secret_prompt = getpass
     
     return JiraConfig(
-        api_key=os.getenv('JIRA_API_KEY') or getpass("Jira API Key: "),
-        url=os.getenv('JIRA_URL') or input("Jira URL: "),
-        email=os.getenv('JIRA_EMAIL') or input("Jira Email: "),
-        project_key=os.getenv('PROJECT_KEY') or input("Project Key: "),
+        api_key=os.getenv('JIRA_API_KEY') or secret_prompt("Jira API Key: "),
+        url=os.getenv('JIRA_URL') or prompt("Jira URL: "),
+        email=os.getenv('JIRA_EMAIL') or prompt("Jira Email: "),
+        project_key=os.getenv('PROJECT_KEY') or prompt("Project Key: "),
         epic_link_field=os.getenv('EPIC_LINK_FIELD', 'customfield_10014'),
-        acceptance_criteria_field=os.getenv('ACCEPTANCE_CRITERIA_FIELD', 'customfield_10155')
+        acceptance_criteria_field=os.getenv('ACCEPTANCE_CRITERIA_FIELD', 'customfield_10155'),
+        epic_link_field_name=os.getenv('EPIC_LINK_FIELD_NAME', 'Epic Link'),
+        acceptance_criteria_field_name=os.getenv('ACCEPTANCE_CRITERIA_FIELD_NAME', 'Acceptance Criteria'),
+        max_workers=int(os.getenv('JIRA_MAX_WORKERS', '1')),
+        requests_per_second=float(os.getenv('JIRA_REQUESTS_PER_SECOND', '10'))
+    )
+
+def dry_run(config: JiraConfig,
+            input_file: str,
+            plan_file: str,
+            parent_key: str,
+            bulk: bool = False,
+            dedupe: bool = False,
+            latency: float = 0.5) -> Dict[str, float]:
+    """
+    Write the request plan for an import to JSONL and report its budget
+    
+    Jira is never contacted. Custom field IDs are resolved from the
+    metadata cache a previous real run left behind; without one they stay
+    as configured, which a real run may correct, and the plan's first line
+    says so.
+    
+    Args:
+        config: Jira configuration (only field IDs and limits are used)
+        input_file: Path to the JSON input file
+        plan_file: Path of the JSONL plan to write
+        parent_key: Parent key to place in epic payloads
+        bulk: Estimate for the bulk-create endpoint
+        dedupe: Estimate including the existing-issue search
+        latency: Assumed seconds per request
+        
+    Returns:
+        Summary with issue counts, API calls and estimated seconds
+    """
+    planner = ImportPlanner(config)
+    metadata = FieldMetadataCache(config.metadata_cache_file, config.metadata_cache_ttl).get(
+        FieldMetadataCache.key_for(config)
+    )
+    if metadata is None:
+        logger.warning(
+            f"No cached field metadata for {FieldMetadataCache.key_for(config)}; plan uses the configured "
+            f"field IDs ({config.epic_link_field}, {config.acceptance_criteria_field}) unresolved"
+        )
+    else:
+        planner.resolve_fields(metadata)
+    
+    counts = {'epic': 0, 'story': 0}
+    started = time.perf_counter()
+    
+    with open(plan_file, 'w', encoding='utf-8') as file:
+        file.write(json.dumps({
+            'kind': 'meta',
+            'field_ids': 'unresolved' if metadata is None else 'resolved',
+            'epic_link_field': config.epic_link_field,
+            'acceptance_criteria_field': config.acceptance_criteria_field
+        }) + '\n')
+        for entry in planner.plan(JiraDataParser.iter_epics(input_file), parent_key):
+            counts[entry['kind']] += 1
+            file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    
+    planning_seconds = time.perf_counter() - started
+    estimate = planner.estimate(counts['epic'], counts['story'], bulk, dedupe, latency,
+                                metadata_cached=metadata is not None)
+    
+    logger.info(f"Planned {counts['epic']} epics and {counts['story']} stories in {planning_seconds:.3f}s")
+    logger.info(
+        f"Estimated {estimate['api_calls']} API calls ({estimate['setup_calls']} setup), "
+        f"~{estimate['seconds']:.1f}s "
+        f"(workers={config.max_workers}, batch={config.bulk_batch_size if bulk else 1}, "
+        f"rate={config.requests_per_second}/s, latency={latency}s)"
+    )
+    logger.info(f"Plan written to {plan_file}")
+    
+    return {
+        'epics': counts['epic'],
+        'stories': counts['story'],
+        'planning_seconds': planning_seconds,
+        'field_ids_resolved': metadata is not None,
+        **estimate
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Create Jira epics and user stories from a JSON file')
+    parser.add_argument('input', nargs='?', default='project.json', help='JSON file with epics and stories')
+    parser.add_argument('--bulk', action='store_true', help='Use the bulk-create endpoint')
+    parser.add_argument('--workers', type=int, help='Maximum requests in flight (overrides JIRA_MAX_WORKERS)')
+    parser.add_argument('--on-existing', choices=['skip', 'update', 'create'], default='create',
+                        help='What to do with stories/epics that already exist under the same parent: '
+                             'skip or update them (searches the project first), or create them again '
+                             '(default, no search)')
+    parser.add_argument('--dry-run', action='store_true', help='Write the request plan without calling Jira')
+    parser.add_argument('--plan-output', type=str, help='Plan file for --dry-run (default: <input>.plan.jsonl)')
+    parser.add_argument('--parent', type=str, default='<parent>', help='Parent key used in the --dry-run plan')
+    parser.add_argument('--latency', type=float, default=0.5, help='Assumed seconds per request for --dry-run')
+    args = parser.parse_args()
+    
+    input_file = args.input
+    # Reject a bad file before any issue exists; with ijson this is a
+    # streaming pass, so memory stays flat for large inputs
+    problems = JiraDataParser.validate_file(input_file)
+    if problems:
+        for problem in problems:
+            logger.error(f"{input_file}: {problem}")
+        raise ValueError(f"{input_file} failed validation with {len(problems)} problem(s)")
+    
+    config = load_config(dry_run=args.dry_run)
+    if args.workers:
+        config.max_workers = args.workers
+    on_existing = None if args.on_existing == 'create' else args.on_existing
+    
+    if args.dry_run:
+        dry_run(
+            config,
+            input_file,
+            args.plan_output or f"{input_file}.plan.jsonl",
+            args.parent,
+            bulk=args.bulk,
+            dedupe=on_existing is not None,
+            latency=args.latency
+        )
+        return
+    
+    creator = JiraStoryCreator(config)
+    journal = ImportJournal(f"{input_file}.journal.jsonl")
+    created_issues = creator.create_from_epics(
+        JiraDataParser.iter_epics(input_file),
+        bulk=args.bulk,
+        journal=journal,
+        on_existing=on_existing
     )
+    
+    logger.info(f"Successfully created {len(created_issues)} issues:")
+    logger.info("\n".join(created_issues))
 
 if __name__ == "__main__":
     try:
-        config = load_config()
-        creator = JiraStoryCreator(config)
-        
-        data = JiraDataParser.load_from_file('project.json')
-        created_issues = creator.create_from_json(data)
-        
-        logger.info(f"Successfully created {len(created_issues)} issues:")
-        logger.info("\n".join(created_issues))
-        
+        main()
     except Exception as e:
         logger.error(f"Critical error: {e}", exc_info=True)
-        exit(1)
\ No newline at end of file
+        exit(1)
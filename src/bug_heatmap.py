@@ -8,30 +8,189 @@ import os
 import pandas as pd
 import numpy as np
 import requests
-from jira import JIRA
+from jira_session import create_jira_client
 import matplotlib.pyplot as plt
 import seaborn as sns
+from matplotlib import colormaps
+from matplotlib.colors import to_hex
 from github import Github
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 import argparse
 import configparser
 import logging
+import json
+import html
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# GitHub links to files, directories and pull requests; bare repository
+# links are ignored. URLs end at whitespace, quotes, brackets, pipes
+# (Jira wiki markup [text|url]) and anchors/queries such as #L10-L20.
+GITHUB_URL_PATTERN = re.compile(r"""
+    (?<![\w.-])(?:https?://)?(?:www\.)?github\.com/
+    (?P<repository>[\w.-]+/[\w.-]+?)(?:\.git)?
+    (?:
+        /(?P<kind>blob|tree|blame|raw)/[^/\s|\[\]()<>"'#?]+
+        (?:/(?P<path>[^\s|\[\]()<>"'#?]+))?
+      |
+        /pull/\d+
+    )
+    (?=[\s|\[\]()<>"'#?/]|$)
+""", re.VERBOSE)
+
+class IssueStore:
+    """SQLite store of synced Jira issues, their comments and GitHub references.
+    
+    Issues are linked to every JQL query that returned them, and each query
+    remembers when it was last synced so later runs only fetch issues
+    updated since then.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS issues (
+            key TEXT PRIMARY KEY,
+            summary TEXT,
+            status TEXT,
+            description TEXT,
+            updated TEXT,
+            created TEXT,
+            resolved TEXT
+        );
+        CREATE TABLE IF NOT EXISTS comments (
+            issue_key TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            body TEXT,
+            PRIMARY KEY (issue_key, position)
+        );
+        CREATE TABLE IF NOT EXISTS github_references (
+            issue_key TEXT NOT NULL,
+            repository TEXT,
+            file_path TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_github_references_issue ON github_references (issue_key);
+        CREATE TABLE IF NOT EXISTS query_issues (
+            jql TEXT NOT NULL,
+            issue_key TEXT NOT NULL,
+            PRIMARY KEY (jql, issue_key)
+        );
+        CREATE TABLE IF NOT EXISTS sync_state (
+            jql TEXT PRIMARY KEY,
+            last_sync TEXT NOT NULL
+        );
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(self.SCHEMA)
+    
+    def close(self):
+        self.conn.close()
+    
+    def last_sync(self, jql):
+        """Return the UTC ISO timestamp of the last sync of jql, or None."""
+        row = self.conn.execute("SELECT last_sync FROM sync_state WHERE jql = ?", (jql,)).fetchone()
+        return row[0] if row else None
+    
+    def save_sync(self, jql, issues, synced_at, full):
+        """Store synced issues and record the sync time for jql in one transaction.
+        
+        issues is a list of dicts with key, summary, status, description,
+        updated, created, resolved, comments (list of bodies) and references (list of dicts).
+        A full sync replaces the query's membership; an incremental one adds to it.
+        """
+        with self.conn:
+            if full:
+                self.conn.execute("DELETE FROM query_issues WHERE jql = ?", (jql,))
+            
+            for issue in issues:
+                key = issue['key']
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO issues (key, summary, status, description, updated, created, resolved) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, issue['summary'], issue['status'], issue['description'], issue['updated'],
+                     issue.get('created'), issue.get('resolved'))
+                )
+                self.conn.execute("DELETE FROM comments WHERE issue_key = ?", (key,))
+                self.conn.executemany(
+                    "INSERT INTO comments (issue_key, position, body) VALUES (?, ?, ?)",
+                    [(key, position, body) for position, body in enumerate(issue['comments'])]
+                )
+                self.conn.execute("DELETE FROM github_references WHERE issue_key = ?", (key,))
+                self.conn.executemany(
+                    "INSERT INTO github_references (issue_key, repository, file_path) VALUES (?, ?, ?)",
+                    [(key, ref.get('repository', ''), ref.get('file_path', '')) for ref in issue['references']]
+                )
+                self.conn.execute("INSERT OR IGNORE INTO query_issues (jql, issue_key) VALUES (?, ?)", (jql, key))
+            
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (jql, last_sync) VALUES (?, ?)",
+                (jql, synced_at)
+            )
+    
+    def load_references(self, jql):
+        """Return every stored GitHub reference for issues matched by jql."""
+        query = """
+            SELECT i.key AS issue_key, i.summary, r.repository, r.file_path, i.status, i.created, i.resolved
+            FROM query_issues q
+            JOIN issues i ON i.key = q.issue_key
+            JOIN github_references r ON r.issue_key = i.key
+            WHERE q.jql = ?
+            ORDER BY i.key
+        """
+        return pd.read_sql_query(query, self.conn, params=(jql,))
+
 class BugHeatmapGenerator:
-    def __init__(self, config_file='config.ini'):
-        """Initialize with configuration from a config file."""
+    # Only these fields are used when building the heatmap
+    ISSUE_FIELDS = ['summary', 'description', 'status', 'comment', 'updated', 'created', 'resolutiondate']
+    
+    # Bucket sizes accepted by bucket_bugs, as pandas period frequencies
+    PERIODS = {'week': 'W', 'month': 'M'}
+    
+    # Label of the row/column that sums everything outside the top K
+    OTHER_LABEL = '(other)'
+    
+    # Directory label for files at the top of a repository and for
+    # references with no path at all, such as pull requests
+    REPO_ROOT_LABEL = '(repo root)'
+    
+    # Incremental syncs look back this far past the last sync, since JQL
+    # dates are evaluated in the Jira user's time zone rather than UTC
+    SYNC_OVERLAP = timedelta(days=1)
+    
+    def __init__(self, config_file='config.ini', jira=None, github_org=None):
+        """Initialize with configuration from a config file.
+        
+        jira and github_org replace the live connections when given. Any
+        object with the same methods works: jira needs search_issues() and
+        comments(), github_org needs get_repos() returning repositories
+        (see heatmap_fixtures for offline stand-ins). With both given and no
+        config file, a minimal offline configuration is used instead of
+        prompting.
+        """
         self.config = configparser.ConfigParser()
-        if os.path.exists(config_file):
+        if config_file and os.path.exists(config_file):
             self.config.read(config_file)
+        elif jira is not None and github_org is not None:
+            self.config['JIRA'] = {'project_key': 'OFFLINE'}
+            self.config['GITHUB'] = {'organization': 'offline', 'tree_cache': ''}
         else:
             self.setup_config(config_file)
         
         # Initialize connections to Jira and GitHub
-        self.setup_jira()
-        self.setup_github()
+        if jira is not None:
+            self.jira = jira
+        else:
+            self.setup_jira()
+        if github_org is not None:
+            self.org = github_org
+        else:
+            self.setup_github()
         
     def setup_config(self, config_file):
         """Create a new configuration file with user input."""
@@ -54,9 +213,14 @@ class BugHeatmapGenerator:
     def setup_jira(self):
         """Set up connection to Jira."""
         try:
-            self.jira = JIRA(
-                server=self.config['JIRA']['server'],
-                basic_auth=(self.config['JIRA']['username'], self.config['JIRA']['api_token'])
+            jira_config = self.config['JIRA']
+            self.jira = create_jira_client(
+                jira_config['server'],
+                jira_config['username'],
+                jira_config['api_token'],
+                pool_size=jira_config.getint('max_workers', fallback=8),
+                connect_timeout=jira_config.getfloat('connect_timeout', fallback=5.0),
+                read_timeout=jira_config.getfloat('read_timeout', fallback=30.0)
             )
             logger.info("Successfully connected to Jira")
         except Exception as e:
@@ -73,15 +237,48 @@ class BugHeatmapGenerator:
             logger.error(f"Failed to connect to GitHub: {e}")
             raise
     
-    def get_jira_issues(self, custom_jql=None, max_results=1000):
-        """Fetch bug issues from Jira with GitHub references using custom JQL if provided."""
-        if custom_jql:
-            jql_query = custom_jql
-        else:
-            jql_query = f'project = {self.config["JIRA"]["project_key"]} AND issuetype = Bug'
+    def default_jql(self):
+        """JQL used when no custom query is given."""
+        return f'project = {self.config["JIRA"]["project_key"]} AND issuetype = Bug'
+    
+    def get_jira_issues(self, custom_jql=None, max_results=None, page_size=100, fields=None, concurrent=True):
+        """Fetch bug issues from Jira with GitHub references using custom JQL if provided.
+        
+        Pages through every match (or up to max_results) requesting only the
+        fields the heatmap uses. Once the first page reports the total, the
+        remaining pages are fetched concurrently unless concurrent is False.
+        """
+        jql_query = custom_jql or self.default_jql()
+        fields = fields or self.ISSUE_FIELDS
+        
+        def fetch_page(start_at):
+            return self.jira.search_issues(
+                jql_query,
+                startAt=start_at,
+                maxResults=page_size,
+                fields=','.join(fields)
+            )
         
         logger.info(f"Fetching Jira issues with query: {jql_query}")
-        issues = self.jira.search_issues(jql_query, maxResults=max_results)
+        first_page = fetch_page(0)
+        issues = list(first_page)
+        total = first_page.total if max_results is None else min(first_page.total, max_results)
+        
+        # The server may cap the page size below what was asked for
+        step = len(first_page) or page_size
+        starts = list(range(len(issues), total, step))
+        if starts:
+            logger.info(f"Fetching {len(starts)} more pages for {total} issues")
+            if concurrent:
+                max_workers = self.config['JIRA'].getint('max_workers', fallback=8)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    pages = list(executor.map(fetch_page, starts))
+            else:
+                pages = [fetch_page(start) for start in starts]
+            for page in pages:
+                issues.extend(page)
+        
+        issues = issues[:total]
         logger.info(f"Found {len(issues)} issues")
         
         return issues
@@ -89,16 +286,11 @@ class BugHeatmapGenerator:
     def extract_github_references(self, issues):
         """Extract GitHub repository and file references from Jira issues."""
         bug_data = []
+        comments_by_issue = self.get_issue_comments(issues)
         
         for issue in issues:
             # Look for GitHub links in issue description and comments
-            description = issue.fields.description or ""
-            comments = self.jira.comments(issue.key)
-            
-            repo_refs = self.find_github_references(description)
-            
-            for comment in comments:
-                repo_refs.extend(self.find_github_references(comment.body))
+            repo_refs = self.find_issue_references(issue, comments_by_issue.get(issue.key, []))
             
             # Add the discovered references
             for ref in repo_refs:
@@ -107,35 +299,124 @@ class BugHeatmapGenerator:
                     'summary': issue.fields.summary,
                     'repository': ref.get('repository', ''),
                     'file_path': ref.get('file_path', ''),
-                    'directory': self.get_directory(ref.get('file_path', '')),
-                    'status': issue.fields.status.name
+                    'status': issue.fields.status.name,
+                    'created': getattr(issue.fields, 'created', None),
+                    'resolved': getattr(issue.fields, 'resolutiondate', None)
                 })
         
         return pd.DataFrame(bug_data)
     
-    def find_github_references(self, text):
+    def find_issue_references(self, issue, comments):
+        """Find GitHub references in an issue's description and comments.
+        
+        Each repository/path pair is reported once per issue, however many
+        times it is linked.
+        """
+        texts = [issue.fields.description or ""] + [comment.body for comment in comments]
+        unique_refs = {}
+        
+        for text in texts:
+            for ref in self.find_github_references(text):
+                unique_refs.setdefault((ref['repository'], ref['file_path']), ref)
+        
+        return list(unique_refs.values())
+    
+    def sync_issues(self, store, custom_jql=None, page_size=100, full=False):
+        """Sync issues into the local store and return all of the query's references.
+        
+        After the first sync only issues updated since the previous one are
+        fetched and merged. Issues that stop matching the query are only
+        dropped by a full sync.
+        """
+        jql_query = custom_jql or self.default_jql()
+        last_sync = store.last_sync(jql_query)
+        synced_at = datetime.now(timezone.utc)
+        full = full or last_sync is None
+        
+        if full:
+            fetch_jql = jql_query
+        else:
+            since = datetime.fromisoformat(last_sync) - self.SYNC_OVERLAP
+            fetch_jql = self.add_jql_condition(jql_query, f'updated >= "{since:%Y-%m-%d %H:%M}"')
+            logger.info(f"Incremental sync of issues updated since {since:%Y-%m-%d %H:%M}")
+        
+        issues = self.get_jira_issues(custom_jql=fetch_jql, page_size=page_size)
+        comments_by_issue = self.get_issue_comments(issues)
+        
+        records = []
+        for issue in issues:
+            comments = comments_by_issue.get(issue.key, [])
+            records.append({
+                'key': issue.key,
+                'summary': issue.fields.summary,
+                'status': issue.fields.status.name,
+                'description': issue.fields.description or "",
+                'updated': getattr(issue.fields, 'updated', None),
+                'created': getattr(issue.fields, 'created', None),
+                'resolved': getattr(issue.fields, 'resolutiondate', None),
+                'comments': [comment.body for comment in comments],
+                'references': self.find_issue_references(issue, comments)
+            })
+        store.save_sync(jql_query, records, synced_at.isoformat(), full)
+        logger.info(f"Stored {len(records)} issues in {store.path}")
+        
+        return store.load_references(jql_query)
+    
+    @staticmethod
+    def add_jql_condition(jql_query, condition):
+        """AND a condition onto a JQL query, keeping any ORDER BY clause last."""
+        parts = re.split(r'\s+ORDER\s+BY\s+', jql_query, maxsplit=1, flags=re.IGNORECASE)
+        query = f"({parts[0]}) AND {condition}"
+        return f"{query} ORDER BY {parts[1]}" if len(parts) > 1 else query
+    
+    def get_issue_comments(self, issues):
+        """Get comments for each issue, using those embedded in the search results.
+        
+        Only issues whose embedded comment list is missing or truncated are
+        fetched again, concurrently.
+        """
+        comments_by_issue = {}
+        incomplete = []
+        
+        for issue in issues:
+            comment_field = getattr(issue.fields, 'comment', None)
+            if comment_field is None or comment_field.total > len(comment_field.comments):
+                incomplete.append(issue.key)
+            else:
+                comments_by_issue[issue.key] = comment_field.comments
+        
+        if incomplete:
+            logger.info(f"Fetching full comment lists for {len(incomplete)} issues")
+            max_workers = self.config['JIRA'].getint('max_workers', fallback=8)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for key, comments in zip(incomplete, executor.map(self.jira.comments, incomplete)):
+                    comments_by_issue[key] = comments
+        
+        return comments_by_issue
+    
+    @staticmethod
+    def find_github_references(text):
         """Find GitHub repository and file references in text.
         
-        This is a simplified implementation. In a real scenario, you might want to use
-        regex patterns to detect GitHub links or specific formats used in your organization.
+        A single pass of GITHUB_URL_PATTERN picks up blob, blame and raw file
+        links (including permalinks with line anchors), tree links to
+        directories, pull request links and Jira wiki-markup [text|url]
+        links. Directory paths keep a trailing slash so get_directory treats
+        them as directories; pull requests and bare tree links have an empty
+        path, which build_prefix_table labels REPO_ROOT_LABEL.
         """
-        if not text:
+        if not text or 'github.com' not in text:
             return []
         
         references = []
-        # Simple detection for GitHub links
-        # Format: https://github.com/org/repo/blob/branch/path/to/file.ext
-        lines = text.split('\n')
-        for line in lines:
-            if 'github.com' in line and '/blob/' in line:
-                parts = line.split('github.com/')[1].split('/blob/')
-                if len(parts) >= 2:
-                    org_repo = parts[0].strip()
-                    file_path = parts[1].split('/', 1)[1] if '/' in parts[1] else parts[1]
-                    references.append({
-                        'repository': org_repo,
-                        'file_path': file_path
-                    })
+        for match in GITHUB_URL_PATTERN.finditer(text):
+            file_path = (match.group('path') or '').rstrip('.,;:')
+            if match.group('kind') == 'tree' and file_path:
+                file_path = file_path.rstrip('/') + '/'
+            references.append({
+                'repository': match.group('repository'),
+                'file_path': file_path
+            })
         
         return references
     
@@ -150,107 +431,441 @@ class BugHeatmapGenerator:
         else:
             return '/'.join(parts[:depth])
     
-    def scan_repositories(self):
-        """Scan GitHub repositories to get file structure."""
-        repo_data = {}
+    def build_prefix_table(self, bugs_df, keys=('repository',)):
+        """Roll bug counts up to every directory level of the referenced paths.
+        
+        Returns one row per key columns, depth and directory prefix, where a
+        reference counts towards its directory at each depth as given by
+        get_directory, with the repository root labelled REPO_ROOT_LABEL rather
+        than left blank. Each distinct path is split once per level, so the
+        table can be built once and then sliced at any depth or subtree by
+        directory_counts without touching the references again.
+        """
+        keys = list(keys)
+        path_counts = bugs_df.groupby(keys + ['file_path']).size().reset_index(name='bug_count')
+        max_depth = max(int(path_counts['file_path'].str.count('/').max()), 1)
         
-        logger.info(f"Scanning repositories in {self.config['GITHUB']['organization']}")
-        for repo in self.org.get_repos():
-            repo_name = repo.name
-            repo_data[repo_name] = self.scan_repository_structure(repo)
+        levels = []
+        for depth in range(1, max_depth + 1):
+            level = path_counts[keys + ['bug_count']].copy()
+            level['depth'] = depth
+            level['directory'] = (
+                path_counts['file_path'].map(lambda path: self.get_directory(path, depth))
+                .replace('', self.REPO_ROOT_LABEL)
+            )
+            levels.append(level)
         
+        return (
+            pd.concat(levels, ignore_index=True)
+            .groupby(keys + ['depth', 'directory'], sort=False)['bug_count'].sum()
+            .reset_index()
+        )
+    
+    @staticmethod
+    def drill_depth(depth, subtree=None):
+        """Depth to show, at least one level below subtree."""
+        if subtree:
+            return max(depth, subtree.strip('/').count('/') + 2)
+        return depth
+    
+    @staticmethod
+    def in_subtree(directory, subtree=None):
+        """Whether directory is subtree itself or lies below it."""
+        if not subtree:
+            return True
+        subtree = subtree.strip('/')
+        return directory == subtree or directory.startswith(subtree + '/')
+    
+    def directory_counts(self, prefix_table, depth=2, subtree=None):
+        """Bug counts per directory at a given depth, optionally within a subtree.
+        
+        Depths past the deepest referenced path give the same counts as the
+        deepest level.
+        """
+        depth = min(self.drill_depth(depth, subtree), prefix_table['depth'].max())
+        level = prefix_table[prefix_table['depth'] == depth]
+        if subtree:
+            level = level[level['directory'].map(lambda directory: self.in_subtree(directory, subtree))]
+        return level.drop(columns='depth').reset_index(drop=True)
+    
+    def scan_repositories(self, max_depth=3):
+        """Scan GitHub repositories to get file structure.
+        
+        Repositories are scanned in parallel. Structures are cached on disk
+        keyed by repository and HEAD commit, so unchanged repositories are
+        never rescanned; if a repository has not been pushed to since the
+        last run, not even its HEAD is looked up.
+        """
+        github_config = self.config['GITHUB']
+        cache_file = github_config.get('tree_cache', fallback='.github_tree_cache.json')
+        max_workers = github_config.getint('max_workers', fallback=8)
+        cache = self.load_tree_cache(cache_file)
+        
+        logger.info(f"Scanning repositories in {github_config['organization']}")
+        repos = list(self.org.get_repos())
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(
+                lambda repo: self.scan_repository_cached(repo, cache.get(repo.full_name), max_depth),
+                repos
+            ))
+        
+        # Keyed by full name to match the org/repo form of Jira references
+        repo_data = {}
+        for repo, (structure, entry) in zip(repos, results):
+            repo_data[repo.full_name] = structure
+            if entry is not None:
+                cache[repo.full_name] = entry
+        
+        self.save_tree_cache(cache_file, cache)
         return repo_data
     
+    @staticmethod
+    def load_tree_cache(cache_file):
+        """Load cached repository structures, or an empty cache."""
+        if not cache_file or not os.path.exists(cache_file):
+            return {}
+        try:
+            with open(cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable tree cache {cache_file}: {e}")
+            return {}
+    
+    @staticmethod
+    def save_tree_cache(cache_file, cache):
+        """Write cached repository structures back to disk."""
+        if not cache_file:
+            return
+        try:
+            with open(cache_file, 'w') as f:
+                json.dump(cache, f)
+        except OSError as e:
+            logger.warning(f"Could not write tree cache {cache_file}: {e}")
+    
+    def scan_repository_cached(self, repo, entry, max_depth=3):
+        """Return (structure, cache entry) for a repository, reusing entry when still valid.
+        
+        The returned entry is None when the scan failed and nothing should be cached.
+        """
+        pushed_at = repo.pushed_at.isoformat() if repo.pushed_at else None
+        if entry and entry.get('max_depth') == max_depth:
+            if pushed_at and entry.get('pushed_at') == pushed_at:
+                return entry['structure'], entry
+        
+        try:
+            head_sha = repo.get_branch(repo.default_branch).commit.sha
+        except Exception as e:
+            logger.warning(f"Could not resolve HEAD of {repo.full_name}: {e}")
+            return {}, None
+        
+        if entry and entry.get('max_depth') == max_depth and entry.get('sha') == head_sha:
+            return entry['structure'], {**entry, 'pushed_at': pushed_at}
+        
+        try:
+            structure = self.scan_repository_tree(repo, head_sha, max_depth)
+        except Exception as e:
+            logger.error(f"Error scanning repository {repo.name}: {e}")
+            return {}, None
+        
+        return structure, {'sha': head_sha, 'pushed_at': pushed_at, 'max_depth': max_depth, 'structure': structure}
+    
     def scan_repository_structure(self, repo, max_depth=3):
         """Scan repository to get its structure up to max_depth."""
         try:
-            contents = repo.get_contents("")
-            structure = defaultdict(int)
-            
-            while contents:
-                file_content = contents.pop(0)
-                if file_content.type == "dir":
-                    # Count directories up to max_depth
-                    path_parts = file_content.path.split('/')
-                    if len(path_parts) <= max_depth:
-                        structure[file_content.path] += 1
-                    
-                    # Get contents of this directory
-                    if len(path_parts) < max_depth:
-                        try:
-                            directory_contents = repo.get_contents(file_content.path)
-                            contents.extend(directory_contents)
-                        except Exception as e:
-                            logger.warning(f"Error getting contents of {file_content.path}: {e}")
-                else:
-                    # For files, track their parent directories
-                    path_parts = file_content.path.split('/')
-                    if len(path_parts) > 1:
-                        for depth in range(1, min(len(path_parts), max_depth + 1)):
-                            dir_path = '/'.join(path_parts[:depth])
-                            structure[dir_path] += 1
-            
-            return dict(structure)
+            return self.scan_repository_tree(repo, repo.default_branch, max_depth)
         except Exception as e:
             logger.error(f"Error scanning repository {repo.name}: {e}")
             return {}
     
-    def generate_heatmap_data(self, bugs_df, repo_structure=None):
-        """Generate data for the heatmap."""
+    def scan_repository_tree(self, repo, ref, max_depth=3):
+        """Get a repository's structure from one recursive Git Trees API call.
+        
+        Falls back to walking the contents API when GitHub truncates the tree
+        (very large repositories).
+        """
+        tree = repo.get_git_tree(ref, recursive=True)
+        if tree.raw_data.get('truncated'):
+            logger.warning(f"Tree of {repo.name} is truncated, walking contents instead")
+            return self.scan_repository_contents(repo, max_depth)
+        
+        return self.count_structure(
+            ((element.path, element.type == 'tree') for element in tree.tree),
+            max_depth
+        )
+    
+    def scan_repository_contents(self, repo, max_depth=3):
+        """Walk a repository directory by directory with the contents API."""
+        contents = deque(repo.get_contents(""))
+        entries = []
+        
+        while contents:
+            file_content = contents.popleft()
+            is_dir = file_content.type == "dir"
+            entries.append((file_content.path, is_dir))
+            
+            # Get contents of this directory
+            if is_dir and len(file_content.path.split('/')) < max_depth:
+                try:
+                    contents.extend(repo.get_contents(file_content.path))
+                except Exception as e:
+                    logger.warning(f"Error getting contents of {file_content.path}: {e}")
+        
+        return self.count_structure(entries, max_depth)
+    
+    @staticmethod
+    def count_structure(entries, max_depth=3):
+        """Count directories and files under each directory up to max_depth.
+        
+        entries is an iterable of (path, is_dir) pairs.
+        """
+        structure = defaultdict(int)
+        
+        for path, is_dir in entries:
+            path_parts = path.split('/')
+            if len(path_parts) > max_depth:
+                continue
+            if is_dir:
+                # Count directories up to max_depth
+                structure[path] += 1
+            else:
+                # For files, track their parent directories
+                for depth in range(1, len(path_parts)):
+                    structure['/'.join(path_parts[:depth])] += 1
+        
+        return dict(structure)
+    
+    def generate_heatmap_data(self, bugs_df, repo_structure=None, depth=2, subtree=None, prefix_table=None):
+        """Generate data for the heatmap.
+        
+        Bugs are counted per directory at the given depth, optionally only
+        within subtree. Pass a prefix_table from build_prefix_table to render
+        several depths or subtrees of the same references without rebuilding it.
+        """
         # Group bugs by repository and directory
         if bugs_df.empty:
             logger.warning("No bug data to generate heatmap")
             return None
         
         # Count bugs by repository and directory
-        bug_counts = bugs_df.groupby(['repository', 'directory']).size().reset_index(name='bug_count')
+        if prefix_table is None:
+            prefix_table = self.build_prefix_table(bugs_df)
+        bug_counts = self.directory_counts(prefix_table, depth, subtree)
         
         # If we have repository structure, we can enhance the heatmap
         if repo_structure:
-            # Create a more complete matrix including directories without bugs
+            # Build the complete repository x directory matrix in one reindex,
+            # filling directories without bugs with zero
             all_repos = list(repo_structure.keys())
-            all_dirs = set()
-            for repo, dirs in repo_structure.items():
-                for dir_path in dirs:
-                    all_dirs.add(dir_path)
+            depth = self.drill_depth(depth, subtree)
+            all_dirs = list(dict.fromkeys(
+                dir_path for dirs in repo_structure.values() for dir_path in dirs
+                if dir_path.count('/') < depth and self.in_subtree(dir_path, subtree)
+            ))
+            full_index = pd.MultiIndex.from_product([all_repos, all_dirs], names=['repository', 'directory'])
             
-            # Create a complete DataFrame
-            complete_data = []
-            for repo in all_repos:
-                for dir_path in all_dirs:
-                    bug_row = bug_counts[(bug_counts['repository'] == repo) & 
-                                        (bug_counts['directory'] == dir_path)]
-                    bug_count = bug_row['bug_count'].values[0] if not bug_row.empty else 0
-                    complete_data.append({
-                        'repository': repo,
-                        'directory': dir_path,
-                        'bug_count': bug_count
-                    })
+            complete_data = (
+                bug_counts.set_index(['repository', 'directory'])['bug_count']
+                .reindex(full_index, fill_value=0)
+                .reset_index()
+            )
             
-            return pd.DataFrame(complete_data)
+            return complete_data
         else:
             return bug_counts
     
-    def plot_heatmap(self, heatmap_data, output_file="bug_heatmap.png"):
-        """Plot the heatmap and save to file."""
+    def bucket_bugs(self, bugs_df, date_field='created', period='month'):
+        """Add a period column bucketing each reference by its issue's created or resolved date.
+        
+        References without that date (e.g. unresolved issues when bucketing
+        by resolved) are dropped.
+        """
+        dates = pd.to_datetime(bugs_df[date_field], utc=True, errors='coerce')
+        bucketed = bugs_df[dates.notna()].copy()
+        bucketed['period'] = dates[dates.notna()].dt.tz_localize(None).dt.to_period(self.PERIODS[period])
+        return bucketed
+    
+    def generate_period_heatmap_data(self, bugs_df, date_field='created', period='month', depth=2, subtree=None):
+        """Count bugs per period, repository and directory at the given depth."""
+        bucketed = self.bucket_bugs(bugs_df, date_field, period)
+        if bucketed.empty:
+            logger.warning(f"No bugs with a {date_field} date to bucket by {period}")
+            return None
+        
+        prefix_table = self.build_prefix_table(bucketed, keys=['period', 'repository'])
+        return self.directory_counts(prefix_table, depth, subtree)
+    
+    def generate_trend_data(self, bugs_df, date_field='created', period='month', depth=2, subtree=None):
+        """Bug counts per repository/directory and period, with a linear trend.
+        
+        Returns one row per repository/directory with a column per period
+        (periods without bugs count as zero), the total and the slope of a
+        least-squares line through the counts, sorted by slope so the
+        directories with the fastest rising bug counts come first.
+        """
+        period_data = self.generate_period_heatmap_data(bugs_df, date_field, period, depth, subtree)
+        if period_data is None:
+            return None
+        
+        all_periods = pd.period_range(period_data['period'].min(), period_data['period'].max(),
+                                      freq=self.PERIODS[period])
+        counts = (
+            period_data.pivot_table(index=['repository', 'directory'], columns='period',
+                                    values='bug_count', aggfunc='sum', fill_value=0)
+            .reindex(columns=all_periods, fill_value=0)
+        )
+        
+        x = np.arange(len(all_periods), dtype=float)
+        x -= x.mean()
+        values = counts.to_numpy(dtype=float)
+        slope = (values - values.mean(axis=1, keepdims=True)) @ x / (x @ x) if len(x) > 1 else np.zeros(len(values))
+        
+        counts.columns = [self.period_label(column) for column in counts.columns]
+        counts['total'] = values.sum(axis=1)
+        counts['slope'] = slope
+        return counts.sort_values(['slope', 'total'], ascending=False).reset_index()
+    
+    def plot_trend(self, trend_data, output_file="bug_trend.png", top_k=10):
+        """Plot bug counts per period for the top_k fastest rising directories.
+        
+        A .csv or .html output file gets the full trend table instead.
+        """
+        if trend_data is None or trend_data.empty:
+            logger.warning("No data to plot trend")
+            return
+        
+        extension = os.path.splitext(output_file)[1].lower()
+        if extension == '.csv':
+            trend_data.to_csv(output_file, index=False)
+            logger.info(f"Trend data saved to {output_file}")
+            return
+        if extension in ('.html', '.htm'):
+            trend_data.to_html(output_file, index=False, float_format='{:.2f}'.format)
+            logger.info(f"Trend data saved to {output_file}")
+            return
+        
+        period_columns = [column for column in trend_data.columns
+                          if column not in ('repository', 'directory', 'total', 'slope')]
+        rising = trend_data.head(top_k)
+        
+        plt.figure(figsize=(15, 8))
+        for _, row in rising.iterrows():
+            plt.plot(period_columns, row[period_columns].to_numpy(), marker='o',
+                     label=f"{row['repository']}: {row['directory']}")
+        
+        plt.title('Bug Trend for Fastest Rising Directories')
+        plt.xlabel('Period')
+        plt.ylabel('Bug Count')
+        plt.xticks(rotation=45, ha='right')
+        plt.legend(fontsize='small', loc='upper left', bbox_to_anchor=(1, 1))
+        plt.tight_layout()
+        
+        plt.savefig(output_file, dpi=150, bbox_inches='tight')
+        logger.info(f"Trend saved to {output_file}")
+        plt.close()
+    
+    @staticmethod
+    def period_label(period):
+        """Label a period by its month, or by the date a week starts on."""
+        return str(period) if period.freqstr.startswith('M') else f"{period.start_time:%Y-%m-%d}"
+    
+    @staticmethod
+    def suffixed_file(output_file, suffix):
+        """Insert a suffix before a file name's extension."""
+        base, extension = os.path.splitext(output_file)
+        return f"{base}_{suffix}{extension}"
+    
+    @staticmethod
+    def collapse_to_top(pivot_data, top_k, axis):
+        """Keep the top_k rows (axis=0) or columns (axis=1) by bug count and sum the rest into OTHER_LABEL."""
+        totals = pivot_data.sum(axis=1 - axis)
+        if not top_k or len(totals) <= top_k:
+            return pivot_data
+        
+        top = totals.sort_values(ascending=False, kind='stable').index[:top_k]
+        if axis == 1:
+            collapsed = pivot_data[top].copy()
+            collapsed[BugHeatmapGenerator.OTHER_LABEL] = pivot_data.drop(columns=top).sum(axis=1)
+        else:
+            collapsed = pivot_data.loc[top].copy()
+            collapsed.loc[BugHeatmapGenerator.OTHER_LABEL] = pivot_data.drop(index=top).sum(axis=0)
+        return collapsed
+    
+    def prepare_heatmap_matrix(self, heatmap_data, top_k=30, top_repos=50):
+        """Pivot heatmap data into a repository x directory matrix of bounded size."""
+        pivot_data = heatmap_data.pivot(index='repository', columns='directory', values='bug_count')
+        pivot_data = pivot_data.fillna(0)
+        
+        pivot_data = self.collapse_to_top(pivot_data, top_k, axis=1)
+        pivot_data = self.collapse_to_top(pivot_data, top_repos, axis=0)
+        return pivot_data
+    
+    def write_heatmap_html(self, pivot_data, output_file):
+        """Write the matrix as a self-contained, colour-scaled HTML table."""
+        cmap = colormaps['YlOrRd']
+        max_count = pivot_data.values.max() or 1
+        
+        header = ''.join(f'<th>{html.escape(str(column))}</th>' for column in pivot_data.columns)
+        rows = []
+        for repository, counts in pivot_data.iterrows():
+            cells = ''.join(
+                f'<td style="background:{to_hex(cmap(count / max_count))}" '
+                f'title="{html.escape(f"{repository} / {directory}: {count:g}")}">{count:g}</td>'
+                for directory, count in counts.items()
+            )
+            rows.append(f'<tr><th>{html.escape(str(repository))}</th>{cells}</tr>')
+        
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(
+                '<!DOCTYPE html><html><head><meta charset="utf-8">'
+                '<title>Bug Heatmap by Repository and Directory</title>'
+                '<style>table{border-collapse:collapse;font:12px Arial}'
+                'td,th{border:1px solid #ddd;padding:2px 6px;text-align:right}'
+                'thead th{writing-mode:vertical-rl;text-align:left}</style></head><body>'
+                '<h3>Bug Heatmap by Repository and Directory</h3>'
+                f'<table><thead><tr><th></th>{header}</tr></thead><tbody>{"".join(rows)}</tbody></table>'
+                '</body></html>'
+            )
+    
+    def plot_heatmap(self, heatmap_data, output_file="bug_heatmap.png", top_k=30, top_repos=50, annotate_max_cells=400):
+        """Plot the heatmap and save to file.
+        
+        Only the top_k directories and top_repos repositories by bug count are
+        shown, the rest are summed into an "(other)" column/row, so rendering
+        time stays bounded regardless of organization size. Cell annotations
+        are drawn only up to annotate_max_cells cells. The output format
+        follows the file extension: .csv writes the matrix, .html a
+        colour-scaled table, anything else (.png, .svg, .pdf) a figure.
+        """
         if heatmap_data is None or heatmap_data.empty:
             logger.warning("No data to plot heatmap")
             return
         
         # Pivot the data for the heatmap
-        pivot_data = heatmap_data.pivot(index='repository', columns='directory', values='bug_count')
-        pivot_data = pivot_data.fillna(0)
+        pivot_data = self.prepare_heatmap_matrix(heatmap_data, top_k, top_repos)
+        
+        extension = os.path.splitext(output_file)[1].lower()
+        if extension == '.csv':
+            pivot_data.to_csv(output_file)
+            logger.info(f"Heatmap matrix saved to {output_file}")
+            return
+        if extension in ('.html', '.htm'):
+            self.write_heatmap_html(pivot_data, output_file)
+            logger.info(f"Heatmap saved to {output_file}")
+            return
+        
+        annotate = pivot_data.size <= annotate_max_cells
         
-        # Set up the plot
-        plt.figure(figsize=(15, 10))
+        # Set up the plot, growing with the matrix up to a fixed cap
+        rows, columns = pivot_data.shape
+        plt.figure(figsize=(min(40, max(15, 0.4 * columns + 4)), min(30, max(10, 0.3 * rows + 3))))
         
         # Create heatmap
-        ax = sns.heatmap(
+        sns.heatmap(
             pivot_data, 
-            annot=True, 
+            annot=annotate, 
             fmt="g", 
             cmap="YlOrRd",
-            linewidths=0.5,
+            linewidths=0.5 if annotate else 0,
             cbar_kws={'label': 'Bug Count'}
         )
         
@@ -261,17 +876,32 @@ class BugHeatmapGenerator:
         plt.tight_layout()
         
         # Save the figure
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        plt.savefig(output_file, dpi=300 if annotate else 150, bbox_inches='tight')
         logger.info(f"Heatmap saved to {output_file}")
         plt.close()
     
-    def run(self, jql_query=None, output_file="bug_heatmap.png"):
-        """Run the full process to generate the heatmap."""
-        # Get Jira issues using the provided JQL query if available
-        issues = self.get_jira_issues(custom_jql=jql_query)
+    def run(self, jql_query=None, output_file="bug_heatmap.png", page_size=100, store_file=None, full_sync=False,
+            top_k=30, top_repos=50, period=None, date_field='created', depth=2, subtree=None):
+        """Run the full process to generate the heatmap.
         
-        # Extract GitHub references
-        bugs_df = self.extract_github_references(issues)
+        With a period ('week' or 'month'), also writes one heatmap per period
+        and a trend plot, bucketed by date_field ('created' or 'resolved'),
+        all from the same fetched issues. Directories are shown at depth,
+        optionally only within subtree.
+        """
+        if store_file:
+            # Sync changed issues into the local store and read references from it
+            store = IssueStore(store_file)
+            try:
+                bugs_df = self.sync_issues(store, custom_jql=jql_query, page_size=page_size, full=full_sync)
+            finally:
+                store.close()
+        else:
+            # Get Jira issues using the provided JQL query if available
+            issues = self.get_jira_issues(custom_jql=jql_query, page_size=page_size)
+            
+            # Extract GitHub references
+            bugs_df = self.extract_github_references(issues)
         
         # If no GitHub references are found, log a warning
         if bugs_df.empty:
@@ -285,24 +915,58 @@ class BugHeatmapGenerator:
             repo_structure = self.scan_repositories()
         
         # Generate heatmap data
-        heatmap_data = self.generate_heatmap_data(bugs_df, repo_structure)
+        heatmap_data = self.generate_heatmap_data(bugs_df, repo_structure, depth=depth, subtree=subtree)
         
         # Plot and save the heatmap
-        self.plot_heatmap(heatmap_data, output_file)
+        self.plot_heatmap(heatmap_data, output_file, top_k=top_k, top_repos=top_repos)
+        
+        if period:
+            period_data = self.generate_period_heatmap_data(bugs_df, date_field, period, depth, subtree)
+            if period_data is not None:
+                for bucket, data in period_data.groupby('period'):
+                    self.plot_heatmap(data.drop(columns='period'), self.suffixed_file(output_file, self.period_label(bucket)),
+                                      top_k=top_k, top_repos=top_repos)
+            
+            trend_data = self.generate_trend_data(bugs_df, date_field, period, depth, subtree)
+            self.plot_trend(trend_data, self.suffixed_file(output_file, 'trend'))
         
         return heatmap_data
 
 def main():
     parser = argparse.ArgumentParser(description='Generate bug heatmap from Jira and GitHub data')
     parser.add_argument('--config', type=str, default='config.ini', help='Configuration file')
-    parser.add_argument('--output', type=str, default='bug_heatmap.png', help='Output file name')
+    parser.add_argument('--output', type=str, default='bug_heatmap.png',
+                        help='Output file name; .csv and .html write a matrix/table instead of an image')
     parser.add_argument('--jql', type=str, help='Custom JQL query to fetch specific issues')
+    parser.add_argument('--page-size', type=int, default=100, help='Issues fetched per Jira search request')
+    parser.add_argument('--store', type=str, help='SQLite file for incremental issue sync')
+    parser.add_argument('--full-sync', action='store_true', help='Refetch every issue into the store')
+    parser.add_argument('--top-k', type=int, default=30, help='Directories shown before collapsing the rest')
+    parser.add_argument('--top-repos', type=int, default=50, help='Repositories shown before collapsing the rest')
+    parser.add_argument('--period', choices=sorted(BugHeatmapGenerator.PERIODS),
+                        help='Also write a heatmap per week/month and a trend plot')
+    parser.add_argument('--date-field', choices=['created', 'resolved'], default='created',
+                        help='Issue date used to bucket bugs into periods')
+    parser.add_argument('--depth', type=int, default=2, help='Directory depth to aggregate bugs at')
+    parser.add_argument('--subtree', type=str, help='Only show directories below this path, e.g. src/api')
     args = parser.parse_args()
     
     jql = "project = CID AND issuetype = Bug AND \"environment[dropdown]\" = Production and status != Declined and createdDate >= startOfYear() ORDER BY created DESC"
         
     generator = BugHeatmapGenerator(config_file=args.config)
-    generator.run(jql_query=args.jql, output_file=args.output)
+    generator.run(
+        jql_query=args.jql,
+        output_file=args.output,
+        page_size=args.page_size,
+        store_file=args.store,
+        full_sync=args.full_sync,
+        top_k=args.top_k,
+        top_repos=args.top_repos,
+        period=args.period,
+        date_field=args.date_field,
+        depth=args.depth,
+        subtree=args.subtree
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
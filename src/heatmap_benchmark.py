@@ -0,0 +1,173 @@
+"""
+Micro-benchmarks for the bug heatmap pipeline
+
+Runs entirely offline on synthetic data, so it needs no Jira or GitHub
+credentials.
+
+Usage:
+python .\src\heatmap_benchmark.py references --issues 2000 --comments 10
+python .\src\heatmap_benchmark.py heatmap-data --repos 200 --dirs 2000
+python .\src\heatmap_benchmark.py pipeline --sizes 100 1000 10000 --repos 50
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from bug_heatmap import BugHeatmapGenerator
+from heatmap_fixtures import FixtureJira, FixtureOrganization, synthetic_text
+
+
+def offline_generator(jira, github_org):
+    """BugHeatmapGenerator wired to fixture data sources."""
+    return BugHeatmapGenerator(config_file=None, jira=jira, github_org=github_org)
+
+
+def bench_references(issues=2000, comments=10, seed=0):
+    """Time find_github_references over a synthetic corpus of descriptions and comments."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(issues):
+        corpus.append(synthetic_text(rng, words=800, links=2))
+        corpus.extend(synthetic_text(rng, words=150, links=1) for _ in range(comments))
+    size_mb = sum(len(text) for text in corpus) / 1e6
+
+    started = time.perf_counter()
+    found = sum(len(BugHeatmapGenerator.find_github_references(text)) for text in corpus)
+    elapsed = time.perf_counter() - started
+
+    print(f"references: {len(corpus)} texts, {size_mb:.1f} MB, {found} references "
+          f"in {elapsed:.3f}s ({size_mb / elapsed:.1f} MB/s)")
+    return elapsed
+
+
+def synthetic_bug_counts(rng, repos=200, dirs=2000, bugs=5000):
+    """Build a repository structure and a bug_counts frame drawn from it."""
+    repo_names = [f"service-{index}" for index in range(repos)]
+    dir_names = [f"src/module_{index // 20}/part_{index % 20}" for index in range(dirs)]
+    repo_structure = {
+        repo: {dir_path: 1 for dir_path in rng.sample(dir_names, min(len(dir_names), 50))}
+        for repo in repo_names
+    }
+    bugs_df = pd.DataFrame({
+        'repository': [rng.choice(repo_names) for _ in range(bugs)],
+        'directory': [rng.choice(dir_names) for _ in range(bugs)],
+    })
+    bugs_df['file_path'] = bugs_df['directory'] + '/handler.py'
+    return bugs_df, repo_structure
+
+
+def loop_heatmap_data(bug_counts, repo_structure):
+    """Previous per-cell implementation, kept as the benchmark baseline."""
+    all_dirs = set()
+    for dirs in repo_structure.values():
+        all_dirs.update(dirs)
+
+    complete_data = []
+    for repo in repo_structure:
+        for dir_path in all_dirs:
+            bug_row = bug_counts[(bug_counts['repository'] == repo) &
+                                 (bug_counts['directory'] == dir_path)]
+            bug_count = bug_row['bug_count'].values[0] if not bug_row.empty else 0
+            complete_data.append({'repository': repo, 'directory': dir_path, 'bug_count': bug_count})
+    return pd.DataFrame(complete_data)
+
+
+def bench_heatmap_data(repos=200, dirs=2000, bugs=5000, baseline=True, seed=0):
+    """Time generate_heatmap_data, optionally against the per-cell baseline."""
+    rng = random.Random(seed)
+    bugs_df, repo_structure = synthetic_bug_counts(rng, repos, dirs, bugs)
+    generator = offline_generator(FixtureJira([]), FixtureOrganization([]))
+
+    started = time.perf_counter()
+    result = generator.generate_heatmap_data(bugs_df, repo_structure, depth=3)
+    elapsed = time.perf_counter() - started
+    print(f"heatmap-data: {repos} repos x {dirs} dirs = {len(result)} cells in {elapsed:.3f}s")
+
+    if baseline:
+        bug_counts = bugs_df.groupby(['repository', 'directory']).size().reset_index(name='bug_count')
+        started = time.perf_counter()
+        expected = loop_heatmap_data(bug_counts, repo_structure)
+        baseline_elapsed = time.perf_counter() - started
+        totals_match = expected['bug_count'].sum() == result['bug_count'].sum()
+        print(f"heatmap-data baseline: {baseline_elapsed:.3f}s "
+              f"({baseline_elapsed / elapsed:.0f}x slower, totals match: {totals_match})")
+    return elapsed
+
+
+def bench_pipeline(sizes=(100, 1000, 5000), repos=50, plot=True, seed=0):
+    """Time each stage of BugHeatmapGenerator.run() at several issue counts."""
+    stages = ['fetch', 'extract', 'scan', 'heatmap-data', 'plot']
+    rows = []
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for size in sizes:
+            generator = offline_generator(
+                FixtureJira.synthetic(issues=size, repos=repos, seed=seed),
+                FixtureOrganization.synthetic(repos=repos, seed=seed)
+            )
+            timings = {}
+
+            started = time.perf_counter()
+            issues = generator.get_jira_issues()
+            timings['fetch'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            bugs_df = generator.extract_github_references(issues)
+            timings['extract'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            repo_structure = generator.scan_repositories()
+            timings['scan'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            heatmap_data = generator.generate_heatmap_data(bugs_df, repo_structure)
+            timings['heatmap-data'] = time.perf_counter() - started
+
+            if plot:
+                started = time.perf_counter()
+                generator.plot_heatmap(heatmap_data, os.path.join(output_dir, f"heatmap_{size}.png"))
+                timings['plot'] = time.perf_counter() - started
+
+            rows.append({'issues': size, 'references': len(bugs_df), **timings})
+
+    results = pd.DataFrame(rows).set_index('issues')
+    print(results.reindex(columns=['references'] + [stage for stage in stages if stage in results]).round(3))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bug heatmap stages on synthetic data')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    references = subparsers.add_parser('references', help='GitHub reference extraction')
+    references.add_argument('--issues', type=int, default=2000, help='Number of synthetic issues')
+    references.add_argument('--comments', type=int, default=10, help='Comments per issue')
+
+    heatmap_data = subparsers.add_parser('heatmap-data', help='Complete repository x directory matrix')
+    heatmap_data.add_argument('--repos', type=int, default=200, help='Number of repositories')
+    heatmap_data.add_argument('--dirs', type=int, default=2000, help='Number of distinct directories')
+    heatmap_data.add_argument('--bugs', type=int, default=5000, help='Number of bug references')
+    heatmap_data.add_argument('--no-baseline', action='store_true',
+                              help='Skip the per-cell baseline (it takes minutes at default sizes)')
+
+    pipeline = subparsers.add_parser('pipeline', help='Every stage of run() on fixture data')
+    pipeline.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000], help='Issue counts to run')
+    pipeline.add_argument('--repos', type=int, default=50, help='Number of synthetic repositories')
+    pipeline.add_argument('--no-plot', action='store_true', help='Skip the plotting stage')
+
+    args = parser.parse_args()
+    if args.benchmark == 'pipeline':
+        bench_pipeline(sizes=args.sizes, repos=args.repos, plot=not args.no_plot)
+    elif args.benchmark == 'references':
+        bench_references(issues=args.issues, comments=args.comments)
+    elif args.benchmark == 'heatmap-data':
+        bench_heatmap_data(repos=args.repos, dirs=args.dirs, bugs=args.bugs, baseline=not args.no_baseline)
+
+
+if __name__ == "__main__":
+    main()
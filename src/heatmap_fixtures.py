@@ -0,0 +1,211 @@
+"""
+Offline stand-ins for the Jira and GitHub data sources of BugHeatmapGenerator
+
+FixtureJira serves issues from recorded JSON or a synthetic generator and
+FixtureOrganization serves repositories from memory. Both implement only
+the calls the heatmap makes, so the whole pipeline can run, be profiled or
+be tested without network access:
+
+    jira = FixtureJira.synthetic(issues=1000, repos=50)
+    org = FixtureOrganization.synthetic(repos=50)
+    generator = BugHeatmapGenerator(config_file=None, jira=jira, github_org=org)
+
+Recorded fixtures use the format written by record_jira_fixture:
+
+    {"issues": [{"key": "BUG-1", "summary": "...", "description": "...",
+                 "status": "Open", "created": "...", "updated": "...",
+                 "resolutiondate": null, "comments": ["..."]}]}
+"""
+
+import hashlib
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+FILLER_WORDS = (
+    "error timeout null pointer when saving the estimate customer reported "
+    "production deploy rollback investigate logs stack trace retry queue"
+).split()
+
+STATUSES = ['Open', 'In Progress', 'In Review', 'Done']
+
+
+class ResultList(list):
+    """List of search results carrying the total match count, like jira.client.ResultList."""
+
+    def __init__(self, iterable=(), total=0):
+        super().__init__(iterable)
+        self.total = total
+
+
+class FixtureJira:
+    """Stand-in for jira.JIRA serving issues from memory.
+
+    Every search returns all issues, paginated; the JQL itself is ignored.
+    """
+
+    def __init__(self, issues, embedded_comments=20):
+        """issues is a list of fixture issue dicts; embedded_comments caps the
+        comments returned inside search results, as Jira does."""
+        self.issues = issues
+        self.embedded_comments = embedded_comments
+        self._by_key = {issue['key']: issue for issue in issues}
+
+    @classmethod
+    def from_file(cls, path):
+        """Load issues recorded by record_jira_fixture."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['issues'])
+
+    @classmethod
+    def synthetic(cls, issues=1000, repos=50, comments=5, seed=0):
+        """Generate issues whose texts link to files in FixtureOrganization.synthetic repos."""
+        rng = random.Random(seed)
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        generated = []
+
+        for index in range(issues):
+            created = start + timedelta(hours=rng.randrange(24 * 365))
+            resolved = created + timedelta(days=rng.randrange(1, 60)) if rng.random() < 0.6 else None
+            generated.append({
+                'key': f"BUG-{index + 1}",
+                'summary': f"Synthetic bug {index + 1}",
+                'description': synthetic_text(rng, repos, words=200, links=rng.randrange(0, 3)),
+                'status': 'Done' if resolved else rng.choice(STATUSES[:-1]),
+                'created': created.isoformat(),
+                'updated': (resolved or created).isoformat(),
+                'resolutiondate': resolved.isoformat() if resolved else None,
+                'comments': [synthetic_text(rng, repos, words=40, links=rng.randrange(0, 2))
+                             for _ in range(rng.randrange(comments + 1))]
+            })
+
+        return cls(generated)
+
+    def _issue(self, data):
+        comments = [SimpleNamespace(body=body) for body in data.get('comments', [])]
+        return SimpleNamespace(
+            key=data['key'],
+            fields=SimpleNamespace(
+                summary=data.get('summary'),
+                description=data.get('description'),
+                status=SimpleNamespace(name=data.get('status')),
+                created=data.get('created'),
+                updated=data.get('updated'),
+                resolutiondate=data.get('resolutiondate'),
+                comment=SimpleNamespace(comments=comments[:self.embedded_comments], total=len(comments))
+            )
+        )
+
+    def search_issues(self, jql_str, startAt=0, maxResults=50, fields=None, **kwargs):
+        page = self.issues[startAt:startAt + maxResults]
+        return ResultList((self._issue(data) for data in page), total=len(self.issues))
+
+    def comments(self, issue):
+        key = getattr(issue, 'key', issue)
+        return [SimpleNamespace(body=body) for body in self._by_key[key].get('comments', [])]
+
+
+class FixtureRepository:
+    """Stand-in for github.Repository.Repository built from a list of file paths."""
+
+    def __init__(self, name, paths, owner='fixture', pushed_at=None):
+        self.name = name
+        self.full_name = f"{owner}/{name}"
+        self.default_branch = 'main'
+        self.pushed_at = pushed_at or datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.paths = sorted(paths)
+        self.sha = hashlib.sha1('\n'.join(self.paths).encode('utf-8')).hexdigest()
+
+        directories = set()
+        for path in self.paths:
+            parts = path.split('/')
+            directories.update('/'.join(parts[:depth]) for depth in range(1, len(parts)))
+        self.directories = sorted(directories)
+
+    def get_branch(self, branch):
+        return SimpleNamespace(name=branch, commit=SimpleNamespace(sha=self.sha))
+
+    def get_git_tree(self, sha, recursive=False):
+        elements = [SimpleNamespace(path=path, type='tree') for path in self.directories]
+        elements += [SimpleNamespace(path=path, type='blob') for path in self.paths]
+        return SimpleNamespace(sha=self.sha, tree=elements, raw_data={'truncated': False})
+
+    def get_contents(self, path):
+        prefix = f"{path}/" if path else ""
+        children = []
+        for directory in self.directories:
+            if directory.startswith(prefix) and '/' not in directory[len(prefix):]:
+                children.append(SimpleNamespace(path=directory, type='dir'))
+        for file_path in self.paths:
+            if file_path.startswith(prefix) and '/' not in file_path[len(prefix):]:
+                children.append(SimpleNamespace(path=file_path, type='file'))
+        return children
+
+
+class FixtureOrganization:
+    """Stand-in for github.Organization.Organization."""
+
+    def __init__(self, repositories):
+        self.repositories = repositories
+
+    @classmethod
+    def synthetic(cls, repos=50, files=200, seed=0):
+        """Generate repositories named service-N with a src/module_M/handler_K.py layout."""
+        rng = random.Random(seed)
+        return cls([
+            FixtureRepository(
+                f"service-{index}",
+                {synthetic_path(rng) for _ in range(files)}
+            )
+            for index in range(repos)
+        ])
+
+    def get_repos(self):
+        return list(self.repositories)
+
+
+def synthetic_path(rng):
+    """Random file path in the layout used by synthetic repositories."""
+    return f"src/module_{rng.randrange(20)}/handler_{rng.randrange(50)}.py"
+
+
+def synthetic_text(rng, repos=50, words=400, links=3):
+    """Build a Jira-style text block with GitHub links in several formats."""
+    tokens = [rng.choice(FILLER_WORDS) for _ in range(words)]
+    for _ in range(links):
+        repo = f"fixture/service-{rng.randrange(repos)}"
+        path = synthetic_path(rng)
+        link = rng.choice([
+            f"https://github.com/{repo}/blob/main/{path}",
+            f"https://github.com/{repo}/blob/4f1c2d9/{path}#L{rng.randrange(1, 400)}-L{rng.randrange(400, 800)}",
+            f"[see here|https://github.com/{repo}/tree/develop/{path.rsplit('/', 1)[0]}]",
+            f"https://github.com/{repo}/pull/{rng.randrange(1, 5000)}/files",
+        ])
+        tokens.insert(rng.randrange(len(tokens) + 1), link)
+    # Break into lines like a real description
+    return "\n".join(" ".join(tokens[i:i + 12]) for i in range(0, len(tokens), 12))
+
+
+def record_jira_fixture(generator, path, jql_query=None):
+    """Fetch issues through a live BugHeatmapGenerator and save them as a fixture file."""
+    issues = generator.get_jira_issues(custom_jql=jql_query)
+    comments_by_issue = generator.get_issue_comments(issues)
+
+    def field(issue, name):
+        return getattr(issue.fields, name, None)
+
+    recorded = [{
+        'key': issue.key,
+        'summary': issue.fields.summary,
+        'description': issue.fields.description,
+        'status': issue.fields.status.name,
+        'created': field(issue, 'created'),
+        'updated': field(issue, 'updated'),
+        'resolutiondate': field(issue, 'resolutiondate'),
+        'comments': [comment.body for comment in comments_by_issue.get(issue.key, [])]
+    } for issue in issues]
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'issues': recorded}, f, indent=2)
+    return len(recorded)
@@ -0,0 +1,69 @@
+"""
+Shared Jira client factory
+
+Builds JIRA clients whose HTTP session is tuned for many requests in one
+run: a connection pool sized to the number of concurrent workers,
+keep-alive, compressed responses and separate connect/read timeouts.
+The same session is reused for every call made through the client, so
+TLS handshakes happen once per pooled connection rather than per request.
+"""
+
+from typing import Tuple, Union
+from jira import JIRA
+from requests.adapters import HTTPAdapter
+
+
+def create_jira_client(server: str,
+                       email: str,
+                       api_token: str,
+                       pool_size: int = 10,
+                       connect_timeout: float = 5.0,
+                       read_timeout: float = 30.0,
+                       max_retries: int = 3,
+                       get_server_info: bool = True) -> JIRA:
+    """
+    Create a JIRA client with a pooled, keep-alive HTTP session
+
+    Args:
+        server: Jira base URL
+        email: Account email for basic auth
+        api_token: API token for basic auth
+        pool_size: Connections kept open per host; match it to the number
+            of concurrent workers so none of them waits for a socket
+        connect_timeout: Seconds to wait for a TCP/TLS connection
+        read_timeout: Seconds to wait for a response once connected
+        max_retries: Retries done by the jira library itself; pass 0 when
+            the caller applies its own retry policy
+        get_server_info: Call serverInfo on connect to verify credentials
+
+    Returns:
+        Configured JIRA client
+    """
+    timeout: Union[float, Tuple[float, float]] = (connect_timeout, read_timeout)
+    jira = JIRA(
+        server=server,
+        basic_auth=(email, api_token),
+        timeout=timeout,
+        max_retries=max_retries,
+        get_server_info=get_server_info
+    )
+    configure_session(jira, pool_size)
+    return jira
+
+
+def configure_session(jira: JIRA, pool_size: int) -> None:
+    """
+    Tune the HTTP session of an existing JIRA client in place
+
+    Args:
+        jira: Client whose session should be tuned
+        pool_size: Maximum pooled connections per host
+    """
+    session = jira._session
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    })
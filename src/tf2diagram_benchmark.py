@@ -0,0 +1,216 @@
+"""
+Micro-benchmarks for the Terraform diagram generator
+
+Runs on a synthetic module shaped like python-hcl2 output, so it needs no
+Terraform tree on disk.
+
+Usage:
+python .\src\tf2diagram_benchmark.py relationships --services 2000 --vpcs 4
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from typing import Any, Dict, List, Tuple
+
+from TF2Diagram import extract_relationships
+
+
+def resource(resource_type: str, name: str, config: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Resource entry in the format returned by parse_terraform_files."""
+    return f"{resource_type}.{name}", {
+        'type': resource_type,
+        'name': name,
+        'config': config,
+        'file': 'synthetic.tf'
+    }
+
+
+def synthetic_resources(services: int = 2000, vpcs: int = 4, subnets_per_vpc: int = 6,
+                        clusters: int = 10, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build a module with VPCs, subnets, load balancers and ECS services.
+
+    Every service gets its own task definition, target group, security group
+    and log group, so the module has roughly six resources per service.
+    """
+    rng = random.Random(seed)
+    resources = dict([
+        resource('aws_vpc', f"vpc_{v}", {'cidr_block': f"10.{v}.0.0/16", 'tags': {'Name': f"vpc-{v}"}})
+        for v in range(vpcs)
+    ])
+
+    subnets = []
+    for v in range(vpcs):
+        for s in range(subnets_per_vpc):
+            name = f"subnet_{v}_{s}"
+            subnets.append(name)
+            resources.update([resource('aws_subnet', name, {
+                'vpc_id': f"${{aws_vpc.vpc_{v}.id}}",
+                'cidr_block': f"10.{v}.{s}.0/24",
+                'availability_zone': f"us-east-1{'abc'[s % 3]}"
+            })])
+
+    for c in range(clusters):
+        resources.update([resource('aws_ecs_cluster', f"cluster_{c}", {'name': f"cluster-{c}"})])
+
+    for v in range(vpcs):
+        resources.update([resource('aws_lb', f"lb_{v}", {
+            'load_balancer_type': 'application',
+            'subnets': [f"${{aws_subnet.subnet_{v}_{s}.id}}" for s in range(subnets_per_vpc)]
+        })])
+
+    for i in range(services):
+        vpc = rng.randrange(vpcs)
+        resources.update([
+            resource('aws_security_group', f"sg_{i}", {
+                'vpc_id': f"${{aws_vpc.vpc_{vpc}.id}}",
+                'ingress': [{'from_port': 443, 'to_port': 443, 'cidr_blocks': ['0.0.0.0/0']}]
+            }),
+            resource('aws_cloudwatch_log_group', f"logs_{i}", {'name': f"/ecs/service-{i}"}),
+            resource('aws_ecs_task_definition', f"task_{i}", {
+                'family': f"service-{i}",
+                'container_definitions': json.dumps([{
+                    'name': f"service-{i}",
+                    'image': f"123456789012.dkr.ecr.us-east-1.amazonaws.com/service-{i}:latest",
+                    'logConfiguration': {'options': {'awslogs-group': f"/ecs/service-{i}"}}
+                }])
+            }),
+            resource('aws_lb_target_group', f"tg_{i}", {
+                'port': 8080,
+                'vpc_id': f"${{aws_vpc.vpc_{vpc}.id}}"
+            }),
+            resource('aws_ecs_service', f"service_{i}", {
+                'cluster': f"${{aws_ecs_cluster.cluster_{rng.randrange(clusters)}.id}}",
+                'task_definition': f"${{aws_ecs_task_definition.task_{i}.arn}}",
+                'load_balancer': [{
+                    'target_group_arn': f"${{aws_lb_target_group.tg_{i}.arn}}",
+                    'container_port': 8080
+                }],
+                'network_configuration': [{
+                    'subnets': [f"${{aws_subnet.subnet_{vpc}_{s}.id}}" for s in range(2)],
+                    'security_groups': [f"${{aws_security_group.sg_{i}.id}}"]
+                }]
+            }),
+        ])
+
+    return resources
+
+
+def regex_extract_references_from_string(text: str) -> List[str]:
+    """Previous two-regex reference extractor, copied verbatim as the baseline's."""
+    references = []
+    
+    # Regular expressions to find resource references in HCL
+    ref_patterns = [
+        r'(\${)?\s*([a-zA-Z0-9_-]+)\.([a-zA-Z0-9_-]+)(?:\.([a-zA-Z0-9_-]+))?\s*}?',  # ${aws_vpc.main.id}
+        r'([a-zA-Z0-9_-]+)\.([a-zA-Z0-9_-]+)(?:\.([a-zA-Z0-9_-]+))?'                 # aws_vpc.main.id
+    ]
+    
+    for pattern in ref_patterns:
+        matches = re.finditer(pattern, text)
+        for match in matches:
+            # Extract referenced resource type and name
+            if match.group(1) == '${' or match.group(1) is None:
+                # Group arrangement depends on which pattern matched
+                if len(match.groups()) == 3:
+                    ref_type, ref_name = match.group(2), match.group(3)
+                elif len(match.groups()) == 4:
+                    ref_type, ref_name = match.group(2), match.group(3)
+                else:
+                    continue
+                
+                # Create reference ID
+                ref_id = f"{ref_type}.{ref_name}"
+                references.append(ref_id)
+    
+    return references
+
+
+def quadratic_extract_relationships(resources: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+    """Previous scan-everything implementation, kept as the benchmark baseline."""
+    relationships = []
+    containment_relationships = []
+
+    for resource_id, resource in resources.items():
+        try:
+            config_str = json.dumps(resource['config'])
+        except TypeError:
+            config_str = str(resource['config'])
+        for ref_id in regex_extract_references_from_string(config_str):
+            if ref_id != resource_id and ref_id in resources:
+                relationships.append((resource_id, ref_id, "references"))
+
+    for resource_id, resource in resources.items():
+        resource_type = resource['type']
+        if resource_type == 'aws_subnet':
+            if 'vpc_id' in resource['config']:
+                vpc_ref = resource['config']['vpc_id']
+                for vpc_id, vpc in resources.items():
+                    if vpc['type'] == 'aws_vpc' and regex_extract_references_from_string(str(vpc_ref)):
+                        containment_relationships.append((vpc_id, resource_id, "contains"))
+                        break
+        elif resource_type == 'aws_lb':
+            if 'subnets' in resource['config']:
+                subnet_refs_str = str(resource['config']['subnets'])
+                for subnet_id, subnet in resources.items():
+                    if subnet['type'] == 'aws_subnet' and subnet['name'] in subnet_refs_str:
+                        containment_relationships.append((subnet_id, resource_id, "hosts"))
+        elif resource_type == 'aws_ecs_service':
+            if 'cluster' in resource['config']:
+                cluster_ref = resource['config']['cluster']
+                for cluster_id, cluster in resources.items():
+                    if cluster['type'] == 'aws_ecs_cluster' and regex_extract_references_from_string(str(cluster_ref)):
+                        containment_relationships.append((cluster_id, resource_id, "runs"))
+            if 'task_definition' in resource['config']:
+                task_ref = resource['config']['task_definition']
+                for task_id, task in resources.items():
+                    if task['type'] == 'aws_ecs_task_definition' and regex_extract_references_from_string(str(task_ref)):
+                        relationships.append((resource_id, task_id, "uses"))
+        elif resource_type == 'aws_lb_target_group':
+            for ecs_id, ecs in resources.items():
+                if ecs['type'] == 'aws_ecs_service' and 'load_balancer' in ecs['config']:
+                    if resource['name'] in str(ecs['config']['load_balancer']):
+                        relationships.append((resource_id, ecs_id, "routes to"))
+
+    return relationships + containment_relationships
+
+
+def bench_relationships(services: int = 2000, vpcs: int = 4, baseline: bool = True, seed: int = 0) -> float:
+    """Time extract_relationships, optionally against the quadratic baseline."""
+    resources = synthetic_resources(services=services, vpcs=vpcs, seed=seed)
+
+    started = time.perf_counter()
+    relationships = extract_relationships(resources)
+    elapsed = time.perf_counter() - started
+    print(f"relationships: {len(resources)} resources, {len(relationships)} relationships in {elapsed:.3f}s")
+
+    if baseline:
+        started = time.perf_counter()
+        expected = quadratic_extract_relationships(resources)
+        baseline_elapsed = time.perf_counter() - started
+        print(f"relationships baseline: {len(expected)} relationships in {baseline_elapsed:.3f}s "
+              f"({baseline_elapsed / elapsed:.0f}x slower, "
+              f"{len(set(expected) - set(relationships))} baseline-only edges)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Terraform diagram stages on synthetic modules')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    relationships = subparsers.add_parser('relationships', help='Relationship extraction')
+    relationships.add_argument('--services', type=int, default=2000, help='ECS services (about six resources each)')
+    relationships.add_argument('--vpcs', type=int, default=4, help='Number of VPCs')
+    relationships.add_argument('--no-baseline', action='store_true',
+                               help='Skip the quadratic baseline (it takes minutes at large sizes)')
+
+    args = parser.parse_args()
+    if args.benchmark == 'relationships':
+        bench_relationships(services=args.services, vpcs=args.vpcs, baseline=not args.no_baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from jira import JIRAError
+from requests.exceptions import ReadTimeout
+
+from heatmap_fixtures import ResultList
+from UserStoryCreator import JiraConfig
+
+EPIC_LINK_FIELD = 'customfield_10014'
+ACCEPTANCE_CRITERIA_FIELD = 'customfield_10155'
+
+
+def make_config(**overrides):
+    settings = dict(url='https://example.atlassian.net', email='me@example.com', api_key='token',
+                    project_key='PRJ', max_retries=3, retry_delay=0, requests_per_second=1000, burst_size=100,
+                    metadata_cache_file=None)
+    settings.update(overrides)
+    return JiraConfig(**settings)
+
+
+def make_epics(epics=3, stories=2):
+    return [{
+        'title': f"Epic {e}",
+        'description': f"Epic {e} description",
+        'user_stories': [{
+            'title': f"Story {e}-{s}",
+            'description': f"Story {e}-{s} description",
+            'acceptance_criteria': f"Story {e}-{s} works"
+        } for s in range(stories)]
+    } for e in range(epics)]
+
+
+class FakeJira:
+    """In-memory stand-in for jira.JIRA covering the calls JiraStoryCreator makes.
+
+    Summaries in fail_summaries make create_issue raise a client error,
+    summaries in bulk_rejects are rejected by create_issues only, and a
+    bulk batch containing a summary in delays waits that many seconds.
+    A request holding a summary in lost_responses times out once after
+    creating its issues; one holding a summary in dropped_requests times
+    out once without creating anything.
+    """
+
+    def __init__(self, fail_summaries=(), bulk_rejects=(), delays=None, lost_responses=(), dropped_requests=()):
+        self.fail_summaries = set(fail_summaries)
+        self.bulk_rejects = set(bulk_rejects)
+        self.delays = delays or {}
+        self.lost_responses = set(lost_responses)
+        self.dropped_requests = set(dropped_requests)
+        self.issues = {}
+        self.created = []
+        self.bulk_batches = []
+        self._lock = threading.Lock()
+        self.add_issue('Initiative', 'Parent initiative', key='PRJ-PARENT')
+
+    def add_issue(self, issue_type, summary, parent=None, epic=None, key=None):
+        """Put an existing issue in the project, as if created outside the import."""
+        with self._lock:
+            key = key or f"PRJ-{len(self.issues) + 1}"
+            fields = SimpleNamespace(
+                summary=summary,
+                issuetype=SimpleNamespace(name=issue_type),
+                parent=SimpleNamespace(key=parent) if parent else None
+            )
+            setattr(fields, EPIC_LINK_FIELD, epic)
+            self.issues[key] = SimpleNamespace(key=key, fields=fields, update=lambda fields: None)
+            return self.issues[key]
+
+    def _time_out(self, summaries, created):
+        """Raise ReadTimeout once for a request holding one of the configured summaries."""
+        pending = self.lost_responses if created else self.dropped_requests
+        with self._lock:
+            timed_out = pending & set(summaries)
+            pending -= timed_out
+        if timed_out:
+            raise ReadTimeout('read timed out')
+
+    def create_issue(self, fields):
+        self._time_out([fields['summary']], created=False)
+        issue = self._create(fields)
+        self._time_out([fields['summary']], created=True)
+        return issue
+
+    def _create(self, fields):
+        if fields['summary'] in self.fail_summaries:
+            raise JIRAError(status_code=400, text=f"cannot create {fields['summary']}")
+        issue = self.add_issue(
+            fields['issuetype']['name'],
+            fields['summary'],
+            parent=fields.get('parent', {}).get('key'),
+            epic=fields.get(EPIC_LINK_FIELD)
+        )
+        with self._lock:
+            self.created.append(fields)
+        return issue
+
+    def create_issues(self, field_list, prefetch=True):
+        with self._lock:
+            self.bulk_batches.append([fields['summary'] for fields in field_list])
+        time.sleep(max([self.delays.get(fields['summary'], 0) for fields in field_list]))
+        summaries = [fields['summary'] for fields in field_list]
+        self._time_out(summaries, created=False)
+
+        results = []
+        for fields in field_list:
+            if fields['summary'] in self.bulk_rejects or fields['summary'] in self.fail_summaries:
+                results.append({'status': 'Error', 'error': 'rejected', 'issue': None, 'input_fields': fields})
+            else:
+                results.append({'status': 'Success', 'error': None, 'issue': self._create(fields),
+                                'input_fields': fields})
+        self._time_out(summaries, created=True)
+        return results
+
+    def issue(self, key):
+        if key not in self.issues:
+            raise JIRAError(status_code=404, text=f"{key} does not exist")
+        return self.issues[key]
+
+    def search_issues(self, jql_str, startAt=0, maxResults=50, fields=None, **kwargs):
+        issues = [issue for issue in self.issues.values()
+                  if issue.fields.issuetype.name in ('Epic', 'Story')]
+        return ResultList(issues[startAt:startAt + maxResults], total=len(issues))
+
+    def fields(self):
+        return [{'id': EPIC_LINK_FIELD, 'name': 'Epic Link'},
+                {'id': ACCEPTANCE_CRITERIA_FIELD, 'name': 'Acceptance Criteria'},
+                {'id': 'summary', 'name': 'Summary'}]
+
+    def project_issue_types(self, project, maxResults=50):
+        return [SimpleNamespace(name=name) for name in ('Epic', 'Story', 'Task')]
+
+    def summaries(self, keys):
+        return [self.issues[key].fields.summary for key in keys]
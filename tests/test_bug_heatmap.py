@@ -0,0 +1,367 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bug_heatmap import BugHeatmapGenerator, IssueStore
+from heatmap_benchmark import loop_heatmap_data, synthetic_bug_counts
+from heatmap_fixtures import FixtureJira, FixtureOrganization, record_jira_fixture
+
+ROOT = BugHeatmapGenerator.REPO_ROOT_LABEL
+
+
+@pytest.fixture
+def generator():
+    return BugHeatmapGenerator(config_file=None, jira=FixtureJira.synthetic(issues=300, repos=10),
+                               github_org=FixtureOrganization.synthetic(repos=10))
+
+
+def test_pipeline_runs_offline_on_fixtures(generator, tmp_path):
+    output_file = tmp_path / 'heatmap.png'
+
+    heatmap_data = generator.run(output_file=str(output_file))
+
+    assert output_file.exists()
+    assert heatmap_data['bug_count'].sum() > 0
+    assert set(heatmap_data['repository']) <= {repo.full_name for repo in generator.org.get_repos()}
+
+
+def test_recorded_fixture_round_trips(generator, tmp_path):
+    fixture_file = tmp_path / 'issues.json'
+
+    recorded = record_jira_fixture(generator, str(fixture_file))
+    replayed = BugHeatmapGenerator(config_file=None, jira=FixtureJira.from_file(str(fixture_file)),
+                                   github_org=generator.org)
+
+    assert recorded == 300
+    original = generator.extract_github_references(generator.get_jira_issues())
+    assert replayed.extract_github_references(replayed.get_jira_issues()).equals(original)
+
+
+def test_truncated_comment_lists_are_refetched(generator):
+    generator.jira = FixtureJira([
+        {'key': 'BUG-1', 'comments': ["https://github.com/acme/api/blob/main/a.py"]},
+        {'key': 'BUG-2', 'comments': ["no link", "still none", "https://github.com/acme/api/blob/main/b.py"]},
+    ], embedded_comments=2)
+    fetched = []
+    fetch_comments = generator.jira.comments
+    generator.jira.comments = lambda key: fetched.append(key) or fetch_comments(key)
+
+    bugs_df = generator.extract_github_references(generator.get_jira_issues())
+
+    assert fetched == ['BUG-2']
+    assert list(zip(bugs_df['issue_key'], bugs_df['file_path'])) == [('BUG-1', 'a.py'), ('BUG-2', 'b.py')]
+
+
+def test_references_are_unique_per_issue(generator):
+    generator.jira = FixtureJira([{
+        'key': 'BUG-1',
+        'description': "https://github.com/acme/api/blob/main/a.py and again "
+                       "https://github.com/acme/api/blob/dev/a.py",
+        'comments': ["https://github.com/acme/api/blob/main/a.py#L3"],
+    }])
+
+    bugs_df = generator.extract_github_references(generator.get_jira_issues())
+
+    assert list(bugs_df['file_path']) == ['a.py']
+
+
+@pytest.mark.parametrize('concurrent', [True, False])
+@pytest.mark.parametrize('max_results, expected', [(None, 300), (120, 120)])
+def test_every_page_is_fetched_in_order(generator, concurrent, max_results, expected):
+    issues = generator.get_jira_issues(max_results=max_results, page_size=50, concurrent=concurrent)
+
+    assert [issue.key for issue in issues] == [f"BUG-{index + 1}" for index in range(expected)]
+
+
+def link(path):
+    return f"https://github.com/acme/api/blob/main/{path}"
+
+
+def serve(generator, issues):
+    """Point generator at a fixture serving issues and return the list of JQL it is sent."""
+    generator.jira = FixtureJira(issues)
+    queries = []
+    search_issues = generator.jira.search_issues
+    generator.jira.search_issues = lambda jql, **kwargs: queries.append(jql) or search_issues(jql, **kwargs)
+    return queries
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = IssueStore(str(tmp_path / 'issues.db'))
+    yield store
+    store.close()
+
+
+def stored_references(store, jql):
+    references = store.load_references(jql)
+    return sorted(zip(references['issue_key'], references['file_path']))
+
+
+def test_incremental_sync_merges_changed_issues(generator, store):
+    jql = 'project = BUG ORDER BY created DESC'
+    serve(generator, [{'key': 'BUG-1', 'description': link('a.py')}, {'key': 'BUG-2', 'description': link('b.py')}])
+    generator.sync_issues(store, custom_jql=jql)
+    last_sync = datetime.fromisoformat(store.last_sync(jql))
+
+    queries = serve(generator, [{'key': 'BUG-2', 'description': link('c.py')},
+                                {'key': 'BUG-3', 'description': link('d.py')}])
+    generator.sync_issues(store, custom_jql=jql)
+
+    since = last_sync - BugHeatmapGenerator.SYNC_OVERLAP
+    assert queries == [f'(project = BUG) AND updated >= "{since:%Y-%m-%d %H:%M}" ORDER BY created DESC']
+    assert stored_references(store, jql) == [('BUG-1', 'a.py'), ('BUG-2', 'c.py'), ('BUG-3', 'd.py')]
+    assert datetime.fromisoformat(store.last_sync(jql)) > last_sync
+
+
+def test_full_sync_drops_issues_that_no_longer_match(generator, store):
+    jql = 'project = BUG'
+    serve(generator, [{'key': 'BUG-1', 'description': link('a.py')}, {'key': 'BUG-2', 'description': link('b.py')}])
+    generator.sync_issues(store, custom_jql=jql)
+
+    queries = serve(generator, [{'key': 'BUG-2', 'description': link('b.py')}])
+    generator.sync_issues(store, custom_jql=jql, full=True)
+
+    assert queries == [jql]
+    assert stored_references(store, jql) == [('BUG-2', 'b.py')]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("see https://github.com/acme/api/blob/main/src/app/views.py for details",
+     [('acme/api', 'src/app/views.py')]),
+    ("https://github.com/acme/api/blob/4f1c2d9/src/app/views.py#L10-L20",
+     [('acme/api', 'src/app/views.py')]),
+    ("github.com/acme/api/blame/main/src/app/views.py.", [('acme/api', 'src/app/views.py')]),
+    ("https://github.com/acme/api/raw/main/setup.cfg", [('acme/api', 'setup.cfg')]),
+    ("[the handler|https://github.com/acme/api/tree/develop/src/app]", [('acme/api', 'src/app/')]),
+    ("https://github.com/acme/api.git/blob/main/README.md", [('acme/api', 'README.md')]),
+    ("https://github.com/acme/api/pull/42/files", [('acme/api', '')]),
+    ("https://github.com/acme/api/tree/main", [('acme/api', '')]),
+    ("https://github.com/acme/api and https://github.com/acme", []),
+    ("https://notgithub.com/acme/api/blob/main/a.py", []),
+    ("first https://github.com/a/b/blob/main/x.py\nthen https://github.com/c/d/blob/main/y/z.py",
+     [('a/b', 'x.py'), ('c/d', 'y/z.py')]),
+    ("", []),
+    (None, []),
+])
+def test_find_github_references(text, expected):
+    references = BugHeatmapGenerator.find_github_references(text)
+
+    assert [(ref['repository'], ref['file_path']) for ref in references] == expected
+
+
+def test_path_less_references_count_towards_repo_root(generator):
+    bugs_df = pd.DataFrame({
+        'repository': ['acme/api'] * 4,
+        'file_path': ['', 'README.md', 'src/app/views.py', 'src/app/'],
+    })
+
+    counts = generator.directory_counts(generator.build_prefix_table(bugs_df), depth=1)
+
+    assert '' not in set(counts['directory'])
+    assert dict(zip(counts['directory'], counts['bug_count'])) == {ROOT: 2, 'src': 2}
+
+
+def sorted_counts(frame):
+    return frame[['repository', 'directory', 'bug_count']].sort_values(['repository', 'directory']) \
+        .reset_index(drop=True).astype({'bug_count': 'int64'})
+
+
+def test_heatmap_data_matches_per_cell_loop(generator):
+    bugs_df, repo_structure = synthetic_bug_counts(random.Random(0), repos=15, dirs=60, bugs=400)
+    bug_counts = bugs_df.groupby(['repository', 'directory']).size().reset_index(name='bug_count')
+
+    result = generator.generate_heatmap_data(bugs_df, repo_structure, depth=3)
+    expected = loop_heatmap_data(bug_counts, repo_structure)
+
+    pd.testing.assert_frame_equal(sorted_counts(result), sorted_counts(expected))
+
+
+@pytest.fixture
+def scanner(tmp_path):
+    """Generator scanning three small fixture repositories through a tree cache in tmp_path."""
+    org = FixtureOrganization.synthetic(repos=3, files=30)
+    generator = BugHeatmapGenerator(config_file=None, jira=FixtureJira([]), github_org=org)
+    generator.config['GITHUB']['tree_cache'] = str(tmp_path / 'trees.json')
+    return generator
+
+
+def count_calls(repositories, *methods):
+    """Count calls to methods of each repository, by (repository name, method)."""
+    calls = Counter()
+    for repo in repositories:
+        for method in methods:
+            def counted(*args, repo=repo, method=method, call=getattr(repo, method), **kwargs):
+                calls[repo.name, method] += 1
+                return call(*args, **kwargs)
+            setattr(repo, method, counted)
+    return calls
+
+
+def test_unchanged_repositories_are_not_rescanned(scanner):
+    first = scanner.scan_repositories()
+    repos = scanner.org.get_repos()
+    calls = count_calls(repos, 'get_branch', 'get_git_tree')
+
+    assert scanner.scan_repositories() == first
+    assert calls == {}
+
+    # A push that leaves HEAD where it was costs one branch lookup, not a tree
+    repos[0].pushed_at += timedelta(hours=1)
+    assert scanner.scan_repositories() == first
+    assert calls == {('service-0', 'get_branch'): 1}
+
+
+def test_failed_scans_are_not_cached(scanner):
+    repos = scanner.org.get_repos()
+    expected = scanner.scan_repository_structure(repos[1])
+
+    def rate_limited(*args, **kwargs):
+        raise RuntimeError("rate limited")
+
+    repos[1].get_git_tree = rate_limited
+    assert scanner.scan_repositories()['fixture/service-1'] == {}
+
+    del repos[1].get_git_tree
+    calls = count_calls(repos, 'get_git_tree')
+
+    assert scanner.scan_repositories()['fixture/service-1'] == expected
+    assert calls == {('service-1', 'get_git_tree'): 1}
+
+
+def test_truncated_tree_falls_back_to_contents_walk(scanner):
+    repo = scanner.org.get_repos()[0]
+    expected = scanner.scan_repository_tree(repo, repo.sha)
+    tree = repo.get_git_tree(repo.sha, recursive=True)
+    repo.get_git_tree = lambda *args, **kwargs: SimpleNamespace(tree=tree.tree[:5], raw_data={'truncated': True})
+    calls = count_calls([repo], 'get_contents')
+
+    assert scanner.scan_repository_tree(repo, repo.sha) == expected
+    assert calls[repo.name, 'get_contents'] > 1
+
+
+@pytest.fixture
+def heatmap_data(generator):
+    bugs_df, repo_structure = synthetic_bug_counts(random.Random(0), repos=15, dirs=60, bugs=400)
+    return generator.generate_heatmap_data(bugs_df, repo_structure, depth=3)
+
+
+def test_collapsed_matrix_keeps_the_totals(generator, heatmap_data):
+    full = heatmap_data.pivot(index='repository', columns='directory', values='bug_count').fillna(0)
+
+    collapsed = generator.prepare_heatmap_matrix(heatmap_data, top_k=5, top_repos=4)
+
+    OTHER = BugHeatmapGenerator.OTHER_LABEL
+    assert collapsed.shape == (5, 6)
+    assert collapsed.index[-1] == OTHER and collapsed.columns[-1] == OTHER
+    assert collapsed.values.sum() == full.values.sum()
+    pd.testing.assert_series_equal(collapsed.drop(columns=OTHER).sum(), full[collapsed.columns[:-1]].sum())
+    pd.testing.assert_series_equal(collapsed.drop(index=OTHER).sum(axis=1), full.loc[collapsed.index[:-1]].sum(axis=1))
+
+
+@pytest.mark.parametrize('extension', ['csv', 'html'])
+def test_output_format_follows_the_extension(generator, heatmap_data, tmp_path, extension):
+    output_file = tmp_path / f'heatmap.{extension}'
+
+    generator.plot_heatmap(heatmap_data, output_file=str(output_file), top_k=5, top_repos=4)
+
+    if extension == 'csv':
+        written = pd.read_csv(output_file, index_col=0)
+        assert written.values.sum() == heatmap_data['bug_count'].sum()
+        assert list(written.columns)[-1] == BugHeatmapGenerator.OTHER_LABEL
+    else:
+        text = output_file.read_text(encoding='utf-8')
+        assert text.count('<tr>') == 1 + 5 and BugHeatmapGenerator.OTHER_LABEL in text
+
+
+def test_period_heatmap_buckets_every_reference(generator):
+    bugs_df = generator.extract_github_references(generator.get_jira_issues())
+
+    period_data = generator.generate_period_heatmap_data(bugs_df, period='month', depth=2)
+
+    assert period_data['bug_count'].sum() == len(bugs_df)
+
+
+def dated_bugs(*dates):
+    """One reference to acme/api/src/app per (created, resolved) pair."""
+    return pd.DataFrame({
+        'repository': 'acme/api',
+        'file_path': 'src/app/views.py',
+        'created': [created for created, _ in dates],
+        'resolved': [resolved for _, resolved in dates],
+    })
+
+
+@pytest.mark.parametrize('period, expected', [
+    ('month', ['2025-01', '2025-01', '2025-02']),
+    ('week', ['2024-12-30', '2025-01-27', '2025-02-03']),
+])
+def test_bugs_are_bucketed_by_period(generator, period, expected):
+    bugs_df = dated_bugs(('2025-01-01T10:00:00+00:00', None), ('2025-01-31T23:00:00+00:00', None),
+                         ('2025-02-03T00:00:00+00:00', None))
+
+    bucketed = generator.bucket_bugs(bugs_df, period=period)
+
+    assert [generator.period_label(bucket) for bucket in bucketed['period']] == expected
+
+
+def test_bucketing_by_resolved_drops_unresolved_bugs(generator):
+    bugs_df = dated_bugs(('2025-01-05', '2025-03-01'), ('2025-01-06', None), ('2025-01-07', '2025-04-02'))
+
+    bucketed = generator.bucket_bugs(bugs_df, date_field='resolved', period='month')
+
+    assert [str(bucket) for bucket in bucketed['period']] == ['2025-03', '2025-04']
+    assert generator.bucket_bugs(bugs_df.iloc[[1]], date_field='resolved').empty
+    assert generator.generate_trend_data(bugs_df.iloc[[1]], date_field='resolved') is None
+
+
+def test_trend_is_the_least_squares_slope(generator):
+    # 1, 0 (no bugs), 3 and 5 bugs in four consecutive months
+    months = ['2025-01'] + ['2025-03'] * 3 + ['2025-04'] * 5
+    bugs_df = dated_bugs(*[(f"{month}-15", None) for month in months])
+    bugs_df.loc[len(bugs_df)] = ['acme/web', 'README.md', '2025-02-10', None]
+
+    trend = generator.generate_trend_data(bugs_df, period='month', depth=1)
+
+    assert list(trend.columns) == ['repository', 'directory', '2025-01', '2025-02', '2025-03', '2025-04',
+                                   'total', 'slope']
+    rising = trend.iloc[0]
+    assert (rising['repository'], rising['directory']) == ('acme/api', 'src')
+    assert list(rising[['2025-01', '2025-02', '2025-03', '2025-04', 'total']]) == [1, 0, 3, 5, 9]
+    assert rising['slope'] == pytest.approx(np.polyfit(np.arange(4), [1, 0, 3, 5], 1)[0])
+    assert trend.iloc[1]['slope'] < 0
+
+
+def old_directory_counts(generator, bugs_df, depth):
+    """Counts as the per-depth groupby over get_directory computed them."""
+    directories = bugs_df['file_path'].map(lambda path: generator.get_directory(path, depth)).replace('', ROOT)
+    return (
+        bugs_df.assign(directory=directories)
+        .groupby(['repository', 'directory']).size().reset_index(name='bug_count')
+    )
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4, 6])
+def test_prefix_table_matches_per_depth_groupby(generator, depth):
+    bugs_df = generator.extract_github_references(generator.get_jira_issues())
+    prefix_table = generator.build_prefix_table(bugs_df)
+
+    counts = generator.directory_counts(prefix_table, depth)
+
+    pd.testing.assert_frame_equal(sorted_counts(counts), sorted_counts(old_directory_counts(generator, bugs_df, depth)))
+
+
+def test_subtree_drills_one_level_below(generator):
+    bugs_df = pd.DataFrame({
+        'repository': ['acme/api'] * 3,
+        'file_path': ['src/app/views.py', 'src/lib/util.py', 'docs/index.md'],
+    })
+
+    counts = generator.directory_counts(generator.build_prefix_table(bugs_df), depth=1, subtree='src')
+
+    assert sorted(counts['directory']) == ['src/app', 'src/lib']
@@ -0,0 +1,112 @@
+import pytest
+import requests
+from jira import JIRAError
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from helpers import make_config
+from UserStoryCreator import RetryScheduler
+
+
+class FlakyCall:
+    """Raises the given errors in turn, then returns 'ok'."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.attempts = 0
+
+    def __call__(self):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+@pytest.mark.parametrize('error, retryable', [
+    (JIRAError(status_code=429), True),
+    (JIRAError(status_code=500), True),
+    (JIRAError(status_code=503), True),
+    (JIRAError(status_code=400), False),
+    (JIRAError(status_code=404), False),
+    (requests.ConnectionError('connection reset'), True),
+    (requests.Timeout('read timed out'), True),
+    (requests.exceptions.ConnectTimeout('connect timed out'), True),
+])
+def test_is_retryable(error, retryable):
+    assert RetryScheduler.is_retryable(error) is retryable
+
+
+REFUSED = requests.ConnectionError(MaxRetryError(None, '/rest/api/2/issue', NewConnectionError(None, 'refused')))
+
+
+@pytest.mark.parametrize('error, retryable', [
+    (requests.ReadTimeout('read timed out'), False),
+    (requests.ConnectionError('connection aborted'), False),
+    (requests.exceptions.ConnectTimeout('connect timed out'), True),
+    (REFUSED, True),
+    (JIRAError(status_code=503), True),
+])
+def test_non_idempotent_requests_only_retry_unsent_failures(error, retryable):
+    assert RetryScheduler.is_retryable(error, idempotent=False) is retryable
+
+
+def test_read_timeout_of_non_idempotent_call_is_raised_at_once():
+    scheduler = RetryScheduler(make_config())
+    call = FlakyCall(requests.ReadTimeout('read timed out'))
+
+    with pytest.raises(requests.ReadTimeout):
+        scheduler.call(call, "Create issue", idempotent=False)
+    assert call.attempts == 1
+
+
+def test_connection_error_is_retried():
+    scheduler = RetryScheduler(make_config())
+    call = FlakyCall(requests.ConnectionError('connection reset'), requests.Timeout('read timed out'))
+
+    assert scheduler.call(call, "Test") == 'ok'
+    assert call.attempts == 3
+
+
+def test_connection_error_raised_once_retries_are_exhausted():
+    scheduler = RetryScheduler(make_config(max_retries=2))
+    call = FlakyCall(*[requests.ConnectionError('connection reset')] * 3)
+
+    with pytest.raises(requests.ConnectionError):
+        scheduler.call(call, "Test")
+    assert call.attempts == 2
+
+
+def test_client_error_is_not_retried():
+    scheduler = RetryScheduler(make_config())
+    call = FlakyCall(JIRAError(status_code=400, text='Field summary is required'))
+
+    with pytest.raises(JIRAError):
+        scheduler.call(call, "Test")
+    assert call.attempts == 1
+
+
+def test_retry_after_header_is_honored():
+    response = requests.Response()
+    response.headers['Retry-After'] = '0'
+    error = JIRAError(status_code=429, response=response)
+
+    assert RetryScheduler.retry_after(error) == 0.0
+    assert RetryScheduler(make_config()).call(FlakyCall(error), "Test") == 'ok'
+
+
+def test_connect_retries_dropped_connection(monkeypatch):
+    import UserStoryCreator
+
+    attempts = []
+
+    def create_jira_client(*args, **kwargs):
+        attempts.append(kwargs)
+        if len(attempts) == 1:
+            raise requests.ConnectionError('connection reset')
+        return 'client'
+
+    monkeypatch.setattr(UserStoryCreator, 'create_jira_client', create_jira_client)
+    client = UserStoryCreator.JiraClient(make_config())
+
+    assert client.jira == 'client'
+    assert len(attempts) == 2
+    assert attempts[0]['max_retries'] == 0
@@ -0,0 +1,295 @@
+import json
+
+import pytest
+from jira import JIRAError
+
+import UserStoryCreator
+from helpers import ACCEPTANCE_CRITERIA_FIELD, EPIC_LINK_FIELD, FakeJira, make_config, make_epics
+from UserStoryCreator import (FieldMetadataCache, ImportJournal, ImportPlanner, JiraDataParser,
+                              JiraStoryCreator, dry_run, load_config)
+
+MODES = {
+    'serial': dict(bulk=False, config={}),
+    'concurrent': dict(bulk=False, config={'max_workers': 4}),
+    'bulk': dict(bulk=True, config={'max_workers': 4, 'bulk_batch_size': 2}),
+}
+
+
+@pytest.fixture
+def make_creator(monkeypatch):
+    def factory(jira, **overrides):
+        monkeypatch.setattr(UserStoryCreator, 'create_jira_client', lambda *args, **kwargs: jira)
+        monkeypatch.setattr('builtins.input', lambda prompt='': 'PRJ-PARENT')
+        return JiraStoryCreator(make_config(**overrides))
+    return factory
+
+
+def expected_summaries(epics):
+    summaries = []
+    for epic in epics:
+        summaries.append(epic['title'])
+        summaries.extend(story['title'] for story in epic['user_stories'])
+    return summaries
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_keys_follow_input_order(make_creator, mode):
+    jira = FakeJira()
+    creator = make_creator(jira, **MODES[mode]['config'])
+    epics = make_epics(epics=4, stories=3)
+
+    keys = creator.create_from_json({'epics': epics}, bulk=MODES[mode]['bulk'])
+
+    assert jira.summaries(keys) == expected_summaries(epics)
+    for key in keys:
+        fields = jira.issues[key].fields
+        if fields.issuetype.name == 'Story':
+            epic_title = fields.summary.replace('Story', 'Epic').rsplit('-', 1)[0]
+            assert jira.issues[getattr(fields, EPIC_LINK_FIELD)].fields.summary == epic_title
+        else:
+            assert fields.parent.key == 'PRJ-PARENT'
+
+
+def test_bulk_results_keep_order_across_slow_batches_and_retries(make_creator):
+    # The first batch finishes last, and one story is only created by the one-by-one retry
+    jira = FakeJira(bulk_rejects={'Story 1-1'}, delays={'Epic 0': 0.05, 'Story 0-0': 0.05})
+    creator = make_creator(jira, max_workers=4, bulk_batch_size=2)
+    epics = make_epics(epics=3, stories=3)
+
+    keys = creator.create_from_json({'epics': epics}, bulk=True)
+
+    assert jira.summaries(keys) == expected_summaries(epics)
+    assert len(jira.created) == len(keys)
+    assert all(len(batch) <= 2 for batch in jira.bulk_batches)
+
+
+def test_concurrent_failure_stops_the_import(make_creator):
+    jira = FakeJira(fail_summaries={'Epic 1'})
+    creator = make_creator(jira, max_workers=4)
+
+    with pytest.raises(JIRAError):
+        creator.create_from_json({'epics': make_epics(epics=3, stories=2)})
+    assert not any(fields['summary'].startswith('Story 1-') for fields in jira.created)
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_lost_create_response_does_not_duplicate(make_creator, mode):
+    jira = FakeJira(lost_responses={'Epic 1', 'Story 2-0'})
+    creator = make_creator(jira, **MODES[mode]['config'])
+    epics = make_epics(epics=3, stories=2)
+
+    keys = creator.create_from_json({'epics': epics}, bulk=MODES[mode]['bulk'])
+
+    assert jira.summaries(keys) == expected_summaries(epics)
+    assert sorted(fields['summary'] for fields in jira.created) == sorted(expected_summaries(epics))
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_dropped_create_request_is_sent_again(make_creator, mode):
+    jira = FakeJira(dropped_requests={'Story 0-1'})
+    creator = make_creator(jira, **MODES[mode]['config'])
+    epics = make_epics(epics=2, stories=2)
+
+    keys = creator.create_from_json({'epics': epics}, bulk=MODES[mode]['bulk'])
+
+    assert jira.summaries(keys) == expected_summaries(epics)
+    assert len(jira.created) == len(keys)
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_journal_resumes_after_failure(make_creator, tmp_path, mode):
+    jira = FakeJira(fail_summaries={'Story 1-1'})
+    creator = make_creator(jira, **MODES[mode]['config'])
+    epics = make_epics(epics=3, stories=2)
+    journal_file = tmp_path / 'import.journal.jsonl'
+
+    with pytest.raises(JIRAError):
+        creator.create_from_json({'epics': epics}, bulk=MODES[mode]['bulk'],
+                                 journal=ImportJournal(str(journal_file)))
+    created_first = {fields['summary'] for fields in jira.created}
+    assert 'Story 1-1' not in created_first
+
+    jira.fail_summaries.clear()
+    keys = creator.create_from_json({'epics': epics}, bulk=MODES[mode]['bulk'],
+                                    journal=ImportJournal(str(journal_file)))
+
+    assert jira.summaries(keys) == expected_summaries(epics)
+    # Nothing from the first run is created twice
+    summaries = [fields['summary'] for fields in jira.created]
+    assert sorted(summaries) == sorted(expected_summaries(epics))
+
+
+def test_journal_ignores_truncated_last_line(tmp_path):
+    journal_file = tmp_path / 'import.journal.jsonl'
+    journal = ImportJournal(str(journal_file))
+    journal.record('abc', 'PRJ-1', 'epic')
+    with open(journal_file, 'a') as file:
+        file.write('{"hash": "def", "ke')
+
+    reloaded = ImportJournal(str(journal_file))
+
+    assert len(reloaded) == 1
+    assert reloaded.get('abc') == 'PRJ-1'
+
+
+def test_existing_issues_are_skipped(make_creator):
+    jira = FakeJira()
+    epic = jira.add_issue('Epic', 'Epic 0', parent='PRJ-PARENT')
+    story = jira.add_issue('Story', 'Story 0-0', epic=epic.key)
+    creator = make_creator(jira)
+
+    keys = creator.create_from_json({'epics': make_epics(epics=1, stories=2)}, on_existing='skip')
+
+    assert keys[:2] == [epic.key, story.key]
+    assert [fields['summary'] for fields in jira.created] == ['Story 0-1']
+
+
+def test_duplicate_detection_is_reset_between_calls(make_creator):
+    jira = FakeJira()
+    jira.add_issue('Epic', 'Epic 0', parent='PRJ-PARENT')
+    creator = make_creator(jira)
+    epics = make_epics(epics=1, stories=0)
+
+    creator.create_from_json({'epics': epics}, on_existing='skip')
+    assert jira.created == []
+
+    creator.create_from_json({'epics': epics}, on_existing=None)
+    assert [fields['summary'] for fields in jira.created] == ['Epic 0']
+    assert creator.existing_issues is None
+
+
+def test_iter_epics_yields_valid_epics_before_a_bad_one(tmp_path):
+    epics = make_epics(epics=3, stories=1)
+    del epics[2]['user_stories'][0]['title']
+    input_file = tmp_path / 'project.json'
+    input_file.write_text(json.dumps({'epics': epics}))
+
+    streamed = JiraDataParser.iter_epics(str(input_file))
+
+    assert [next(streamed)['title'], next(streamed)['title']] == ['Epic 0', 'Epic 1']
+    with pytest.raises(ValueError, match="title"):
+        next(streamed)
+
+
+@pytest.mark.parametrize('content', ['{"epics": []}', '{"stories": []}'])
+def test_iter_epics_rejects_missing_or_empty_epics(tmp_path, content):
+    input_file = tmp_path / 'project.json'
+    input_file.write_text(content)
+
+    with pytest.raises(ValueError, match="'epics'"):
+        list(JiraDataParser.iter_epics(str(input_file)))
+
+
+def test_invalid_data_is_rejected_before_any_write(make_creator):
+    jira = FakeJira()
+    creator = make_creator(jira)
+    epics = make_epics(epics=2, stories=2)
+    del epics[1]['user_stories'][1]['description']
+
+    with pytest.raises(ValueError, match="description"):
+        creator.create_from_json({'epics': epics})
+    assert jira.created == []
+
+
+def test_validate_file_streams_valid_input(tmp_path, monkeypatch):
+    input_file = tmp_path / 'project.json'
+    input_file.write_text(json.dumps({'epics': make_epics()}))
+
+    def load_with_lines(text):
+        raise AssertionError("valid input should not be parsed whole")
+
+    monkeypatch.setattr(JiraDataParser, '_load_with_lines', staticmethod(load_with_lines))
+    assert JiraDataParser.validate_file(str(input_file)) == []
+
+
+def test_validate_file_reports_line_numbers(tmp_path):
+    epics = make_epics(epics=2, stories=1)
+    del epics[1]['description']
+    input_file = tmp_path / 'project.json'
+    input_file.write_text(json.dumps({'epics': epics}, indent=2))
+
+    problems = JiraDataParser.validate_file(str(input_file))
+
+    assert len(problems) == 1
+    assert problems[0].startswith('line ') and "Epic 1: missing 'description'" in problems[0]
+
+
+def test_validate_file_rejects_empty_epics(tmp_path):
+    input_file = tmp_path / 'project.json'
+    input_file.write_text('{"epics": []}')
+
+    assert JiraDataParser.validate_file(str(input_file)) == ["line 1: 'epics' must not be empty"]
+
+
+def test_estimate_counts_setup_calls():
+    planner = ImportPlanner(make_config())
+
+    uncached = planner.estimate(epic_count=2, story_count=4, latency=0.5)
+    cached = planner.estimate(epic_count=2, story_count=4, latency=0.5, metadata_cached=True)
+
+    # Session, fields, issue types and parent lookup, then one call per issue
+    assert uncached['api_calls'] == 4 + 6
+    assert cached['api_calls'] == 2 + 6
+    assert uncached['seconds'] - cached['seconds'] == pytest.approx(1.0)
+
+
+def test_dry_run_marks_unresolved_field_ids(tmp_path):
+    input_file = tmp_path / 'project.json'
+    input_file.write_text(json.dumps({'epics': make_epics(epics=1, stories=1)}))
+    plan_file = tmp_path / 'plan.jsonl'
+    config = make_config(metadata_cache_file=str(tmp_path / 'metadata.json'))
+
+    summary = dry_run(config, str(input_file), str(plan_file), 'PRJ-PARENT')
+    meta = json.loads(plan_file.read_text().splitlines()[0])
+    assert meta['field_ids'] == 'unresolved'
+    assert summary['field_ids_resolved'] is False
+
+    FieldMetadataCache(config.metadata_cache_file, config.metadata_cache_ttl).put(
+        FieldMetadataCache.key_for(config),
+        {'fields': {'customfield_1': 'Epic Link', 'customfield_2': 'Acceptance Criteria'},
+         'issue_types': ['Epic', 'Story']}
+    )
+    summary = dry_run(config, str(input_file), str(plan_file), 'PRJ-PARENT')
+    meta, epic, story = [json.loads(line) for line in plan_file.read_text().splitlines()]
+    assert meta['field_ids'] == 'resolved'
+    assert story['fields']['customfield_1'] == '<epic 0>'
+    assert summary['setup_calls'] == 2
+
+
+def test_load_config_does_not_print_the_api_key(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('JIRA_API_KEY', 'secret-token')
+    monkeypatch.setenv('JIRA_URL', 'https://jira.example.com')
+    monkeypatch.setenv('JIRA_EMAIL', 'user@example.com')
+    monkeypatch.setenv('PROJECT_KEY', 'PRJ')
+
+    config = load_config()
+
+    assert config.api_key == 'secret-token'
+    assert 'secret-token' not in capsys.readouterr().out
+
+
+def test_field_ids_are_resolved_by_name(make_creator):
+    creator = make_creator(FakeJira(), epic_link_field='customfield_1', acceptance_criteria_field='customfield_2')
+
+    assert creator.config.epic_link_field == EPIC_LINK_FIELD
+    assert creator.config.acceptance_criteria_field == ACCEPTANCE_CRITERIA_FIELD
+
+
+def test_unknown_field_name_is_rejected(make_creator):
+    with pytest.raises(ValueError, match="Missing Field"):
+        make_creator(FakeJira(), epic_link_field='customfield_1', epic_link_field_name='Missing Field')
+
+
+def test_field_metadata_is_fetched_once(make_creator, tmp_path):
+    jira = FakeJira()
+    fetches = []
+    fetch_fields = jira.fields
+    jira.fields = lambda: fetches.append('fields') or fetch_fields()
+    cache_file = str(tmp_path / 'metadata.json')
+
+    make_creator(jira, metadata_cache_file=cache_file)
+    creator = make_creator(jira, metadata_cache_file=cache_file, epic_link_field='customfield_1')
+
+    assert fetches == ['fields']
+    assert creator.config.epic_link_field == EPIC_LINK_FIELD
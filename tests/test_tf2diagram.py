@@ -0,0 +1,291 @@
+import json
+import os
+import textwrap
+
+import pytest
+
+import TF2Diagram
+from TF2Diagram import (build_containment_tree, build_terraform_graph, extract_references, extract_relationships,
+                        identify_nested_resources, parse_files_cached)
+
+
+def write_tf(directory, files):
+    for name, text in files.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(textwrap.dedent(text))
+
+
+def graph(directory):
+    resources, scopes = build_terraform_graph(str(directory), cache_file=None, max_workers=1)
+    return resources, scopes, extract_relationships(resources, scopes)
+
+
+def containment(relationships):
+    return {(source, target) for source, target, kind in relationships if kind != 'references'}
+
+
+NETWORK_MODULE = '''
+    variable "cidr" {}
+    resource "aws_vpc" "main" {
+      cidr_block = var.cidr
+    }
+    output "vpc_id" {
+      value = aws_vpc.main.id
+    }
+'''
+
+SERVICE_MODULE = '''
+    variable "vpc_id" {}
+    locals {
+      vpc = var.vpc_id
+    }
+    resource "aws_subnet" "private" {
+      vpc_id     = local.vpc
+      cidr_block = "10.0.1.0/24"
+    }
+'''
+
+
+@pytest.mark.parametrize('vpc_id, contained', [
+    ('"vpc-0abc123"', False),
+    ('var.vpc_id', True),
+    ('var.with_default', False),
+    ('aws_vpc.main.id', True),
+])
+def test_sole_vpc_is_only_assumed_for_unset_variables(tmp_path, vpc_id, contained):
+    write_tf(tmp_path, {'main.tf': f'''
+        variable "vpc_id" {{}}
+        variable "with_default" {{
+          default = "vpc-0def456"
+        }}
+        resource "aws_vpc" "main" {{}}
+        resource "aws_subnet" "a" {{
+          vpc_id = {vpc_id}
+        }}
+    '''})
+
+    resources, scopes, relationships = graph(tmp_path)
+
+    assert (('aws_vpc.main', 'aws_subnet.a') in containment(relationships)) is contained
+
+
+def test_hard_coded_cluster_arn_is_not_placed_in_sole_cluster(tmp_path):
+    write_tf(tmp_path, {'main.tf': '''
+        resource "aws_ecs_cluster" "main" {}
+        resource "aws_ecs_service" "api" {
+          cluster = "arn:aws:ecs:us-east-1:123456789012:cluster/shared"
+        }
+    '''})
+
+    resources, scopes, relationships = graph(tmp_path)
+
+    assert containment(relationships) == set()
+
+
+@pytest.mark.parametrize('value, references', [
+    ('${aws_vpc.main.id}', ['aws_vpc.main']),
+    ('"main.example.com"', []),
+    ('main.example.com', []),
+    ('"https://${aws_lb.web.dns_name}/health"', ['aws_lb.web']),
+    ('${data.aws_ami.ubuntu.id}', ['data.aws_ami.ubuntu']),
+    ('${module.network.vpc_id}', ['module.network.vpc_id']),
+    ('${format("%s.example.com", var.env)}', ['var.env']),
+    ('${each.value.name}', []),
+    ('${merge(local.tags, {Name = "${aws_vpc.main.id}-vpc"})}', ['local.tags', 'aws_vpc.main']),
+    ('"${join("-", ["${aws_vpc.main.id}", var.x])}"', ['aws_vpc.main', 'var.x']),
+    ('${lookup(var.names, "}")}-${aws_s3_bucket.logs.id}', ['var.names', 'aws_s3_bucket.logs']),
+    ('"$${aws_vpc.escaped.id}"', []),
+])
+def test_extract_references(value, references):
+    assert extract_references({'attribute': value}) == references
+
+
+def test_unchanged_files_are_not_parsed_again(tmp_path, monkeypatch):
+    write_tf(tmp_path, {
+        'vpc.tf': 'resource "aws_vpc" "main" {}\n',
+        'subnet.tf': 'resource "aws_subnet" "a" {}\n',
+        'cluster.tf': 'resource "aws_ecs_cluster" "main" {}\n',
+    })
+    paths = sorted(str(path) for path in tmp_path.glob('*.tf'))
+    cache_file = str(tmp_path / 'cache.json')
+    parsed = []
+    parse_terraform_source = TF2Diagram.parse_terraform_source
+    monkeypatch.setattr(TF2Diagram, 'parse_terraform_source',
+                        lambda path, text: parsed.append(os.path.basename(path)) or parse_terraform_source(path, text))
+
+    first = parse_files_cached(paths, cache_file, max_workers=1)
+    assert sorted(parsed) == ['cluster.tf', 'subnet.tf', 'vpc.tf']
+
+    # A new mtime with the same content (e.g. a checkout) is matched by hash
+    parsed.clear()
+    os.utime(tmp_path / 'vpc.tf', (0, 0))
+    (tmp_path / 'subnet.tf').write_text('resource "aws_subnet" "b" {}\n')
+    second = parse_files_cached(paths, cache_file, max_workers=1)
+    assert parsed == ['subnet.tf']
+    assert second[str(tmp_path / 'vpc.tf')] == first[str(tmp_path / 'vpc.tf')]
+    assert second[str(tmp_path / 'subnet.tf')] != first[str(tmp_path / 'subnet.tf')]
+    assert json.loads((tmp_path / 'cache.json').read_text())[os.path.abspath(tmp_path / 'vpc.tf')]['mtime'] == 0
+
+    # Deleted files are pruned from the cache
+    parsed.clear()
+    (tmp_path / 'cluster.tf').unlink()
+    parse_files_cached([path for path in paths if 'cluster' not in path], cache_file, max_workers=1)
+    assert parsed == []
+    assert set(json.loads((tmp_path / 'cache.json').read_text())) == {
+        os.path.abspath(tmp_path / 'vpc.tf'), os.path.abspath(tmp_path / 'subnet.tf')}
+
+
+def test_library_calls_do_not_write_a_cache(tmp_path, monkeypatch):
+    write_tf(tmp_path / 'tf', {'main.tf': 'resource "aws_vpc" "main" {}\n'})
+    monkeypatch.chdir(tmp_path)
+
+    resources, scopes = build_terraform_graph(str(tmp_path / 'tf'), max_workers=1)
+
+    assert set(resources) == {'aws_vpc.main'}
+    assert sorted(path.name for path in tmp_path.rglob('*') if path.is_file()) == ['main.tf']
+
+
+def test_resources_nest_in_their_deepest_common_container(tmp_path):
+    write_tf(tmp_path, {'main.tf': '''
+        resource "aws_vpc" "main" {}
+        resource "aws_subnet" "a" {
+          vpc_id = aws_vpc.main.id
+        }
+        resource "aws_subnet" "b" {
+          vpc_id = aws_vpc.main.id
+        }
+        resource "aws_instance" "web" {
+          subnet_id = aws_subnet.a.id
+        }
+        resource "aws_lb" "web" {
+          subnets = [aws_subnet.a.id, aws_subnet.b.id]
+        }
+    '''})
+
+    resources, scopes, relationships = graph(tmp_path)
+    containers = identify_nested_resources(resources, relationships)
+
+    assert sorted(containers['aws_subnet.a']) == ['aws_instance.web', 'aws_lb.web']
+    assert build_containment_tree(containers) == {
+        'aws_subnet.a': 'aws_vpc.main',
+        'aws_subnet.b': 'aws_vpc.main',
+        'aws_instance.web': 'aws_subnet.a',
+        'aws_lb.web': 'aws_vpc.main',
+    }
+
+
+def test_resource_in_unrelated_containers_stays_at_top_level():
+    containers = {'aws_vpc.a': ['aws_subnet.a'], 'aws_vpc.b': ['aws_subnet.b'],
+                  'aws_subnet.a': ['aws_lb.web'], 'aws_subnet.b': ['aws_lb.web']}
+
+    assert build_containment_tree(containers) == {'aws_subnet.a': 'aws_vpc.a', 'aws_subnet.b': 'aws_vpc.b'}
+
+
+def test_containers_claiming_each_other_do_not_form_a_cycle():
+    containers = {'aws_vpc.main': ['aws_subnet.a'], 'aws_subnet.a': ['aws_vpc.main']}
+
+    assert build_containment_tree(containers) == {'aws_subnet.a': 'aws_vpc.main'}
+
+
+def test_variables_locals_and_outputs_resolve_across_modules(tmp_path):
+    write_tf(tmp_path, {
+        'main.tf': '''
+            module "network" {
+              source = "./modules/network"
+              cidr   = "10.0.0.0/16"
+            }
+            module "service" {
+              source = "./modules/service"
+              vpc_id = module.network.vpc_id
+            }
+        ''',
+        'modules/network/main.tf': NETWORK_MODULE,
+        'modules/service/main.tf': SERVICE_MODULE,
+    })
+
+    resources, scopes, relationships = graph(tmp_path)
+
+    assert set(resources) == {'module.network.aws_vpc.main', 'module.service.aws_subnet.private'}
+    assert resources['module.service.aws_subnet.private']['type'] == 'aws_subnet'
+    assert containment(relationships) == {('module.network.aws_vpc.main', 'module.service.aws_subnet.private')}
+
+
+def test_module_instantiated_twice_keeps_instances_apart(tmp_path):
+    write_tf(tmp_path, {
+        'main.tf': '''
+            module "blue" {
+              source = "./modules/network"
+              cidr   = "10.0.0.0/16"
+            }
+            module "green" {
+              source = "./modules/network"
+              cidr   = "10.1.0.0/16"
+            }
+            resource "aws_subnet" "a" {
+              vpc_id = module.green.vpc_id
+            }
+        ''',
+        'modules/network/main.tf': NETWORK_MODULE,
+    })
+
+    resources, scopes, relationships = graph(tmp_path)
+
+    assert {'module.blue.aws_vpc.main', 'module.green.aws_vpc.main'} <= set(resources)
+    assert containment(relationships) == {('module.green.aws_vpc.main', 'aws_subnet.a')}
+
+
+def test_roots_with_equal_addresses_are_qualified(tmp_path):
+    root = '''
+        module "network" {
+          source = "../../modules/network"
+          cidr   = "10.0.0.0/16"
+        }
+        resource "aws_subnet" "a" {
+          vpc_id = module.network.vpc_id
+        }
+    '''
+    write_tf(tmp_path, {
+        'envs/dev/main.tf': root,
+        'envs/prod/main.tf': root,
+        'modules/network/main.tf': NETWORK_MODULE,
+    })
+
+    resources, scopes, relationships = graph(tmp_path)
+
+    assert set(resources) == {
+        'envs/dev/aws_subnet.a', 'envs/dev/module.network.aws_vpc.main',
+        'envs/prod/aws_subnet.a', 'envs/prod/module.network.aws_vpc.main',
+    }
+    assert containment(relationships) == {
+        ('envs/dev/module.network.aws_vpc.main', 'envs/dev/aws_subnet.a'),
+        ('envs/prod/module.network.aws_vpc.main', 'envs/prod/aws_subnet.a'),
+    }
+
+
+def test_installed_modules_are_parsed_in_one_batch(tmp_path, monkeypatch):
+    modules = {'vpc': 'network', 'cluster': 'cluster', 'logs': 'logs'}
+    files = {'main.tf': ''.join(f'module "{name}" {{\n  source = "registry/{name}/aws"\n}}\n' for name in modules)}
+    files['.terraform/modules/network/main.tf'] = 'resource "aws_vpc" "main" {}\n'
+    files['.terraform/modules/cluster/main.tf'] = 'resource "aws_ecs_cluster" "main" {}\n'
+    files['.terraform/modules/logs/main.tf'] = 'resource "aws_cloudwatch_log_group" "main" {}\n'
+    write_tf(tmp_path, files)
+    (tmp_path / '.terraform/modules/modules.json').write_text(json.dumps({'Modules': [
+        {'Key': '', 'Source': '', 'Dir': '.'},
+        *({'Key': name, 'Source': f"registry/{name}/aws", 'Dir': f".terraform/modules/{directory}"}
+          for name, directory in modules.items()),
+    ]}))
+
+    batches = []
+    parse_files_cached = TF2Diagram.parse_files_cached
+
+    def counting_parse(file_paths, *args, **kwargs):
+        batches.append(len(file_paths))
+        return parse_files_cached(file_paths, *args, **kwargs)
+
+    monkeypatch.setattr(TF2Diagram, 'parse_files_cached', counting_parse)
+    resources, scopes, relationships = graph(tmp_path)
+
+    assert set(resources) == {'module.vpc.aws_vpc.main', 'module.cluster.aws_ecs_cluster.main',
+                              'module.logs.aws_cloudwatch_log_group.main'}
+    assert batches == [1, 3]